@@ -0,0 +1,283 @@
+"""Benchmarks for PokemonDeckTracker on synthetic match histories.
+
+Runs headless (PySimpleGUI is never imported) and writes machine-readable
+results so runs from different commits can be compared:
+
+    python benchmark.py --sizes 1000 100000 --output bench.json
+    python benchmark.py --sizes 1000 100000 --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from main import DATE_FORMAT, ColumnarMatchStore, PokemonDeckTracker, open_tracker
+
+DEFAULT_SIZES = (1000, 100000, 1000000)
+SINGLE_OPS = 1000
+TIME_BUDGET_SECONDS = 0.5
+
+DECKS = ['Mewtwo ex', 'Pikachu ex', 'Charizard ex', 'Gardevoir', 'Starmie ex', 'Articuno ex',
+         'Dragonite', 'Exeggutor ex', 'Marowak ex', 'Arcanine ex', 'Gyarados ex', 'Venusaur ex',
+         'Celebi ex', 'Pidgeot ex', 'Weezing', 'Greninja', 'Alakazam', 'Golem']
+ARCHETYPES = DECKS + ['Mew ex', 'Aerodactyl ex', 'Dialga ex', 'Palkia ex', 'Leafeon ex', 'Infernape ex',
+                      'Gallade ex', 'Magnezone', 'Lucario', 'Garchomp ex', 'Rampardos', 'Bibarel']
+NOTES = ['', '', '', 'went second', 'went first', 'bricked', 'Misty flips', 'opponent bricked',
+         'misplayed energy', 'close game', 'time out', 'great draws']
+
+def generate_matches(count, seed=0):
+    """Yield a seeded, realistic-looking history.
+
+    Deck and archetype popularity follow a Zipf-like curve, every matchup has
+    its own win probability and dates advance a few minutes per match.
+    """
+    rnd = random.Random(seed)
+    deck_weights = [1 / (rank + 1) for rank in range(len(DECKS))]
+    archetype_weights = [1 / (rank + 1) ** 0.8 for rank in range(len(ARCHETYPES))]
+    edges = {}
+    date = datetime(2024, 1, 1)
+    for _ in range(count):
+        deck = rnd.choices(DECKS, deck_weights)[0]
+        opponent = rnd.choices(ARCHETYPES, archetype_weights)[0]
+        edge = edges.get((deck, opponent))
+        if edge is None:
+            edge = edges[(deck, opponent)] = rnd.uniform(0.3, 0.7)
+        roll = rnd.random()
+        result = 'draw' if roll < 0.03 else ('win' if roll < 0.03 + edge * 0.97 else 'loss')
+        date += timedelta(minutes=rnd.randint(1, 30))
+        yield {
+            'date': date.strftime(DATE_FORMAT),
+            'deck': deck,
+            'opponent': opponent,
+            'result': result,
+            'notes': rnd.choice(NOTES)
+        }
+
+def build_tracker(size, seed=0, storage=None):
+    tracker = PokemonDeckTracker(storage)
+    batch = []
+    for row in generate_matches(size, seed):
+        batch.append(row)
+        if len(batch) == 10000:
+            tracker.add_matches(batch)
+            batch = []
+    tracker.add_matches(batch)
+    return tracker
+
+def _time_repeated(func, max_repeat=50):
+    """Call func until the time budget or max_repeat is used up; returns per-call times"""
+    times = []
+    started = time.perf_counter()
+    while len(times) < max_repeat and (not times or time.perf_counter() - started < TIME_BUDGET_SECONDS):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+def _time_each(func, args):
+    """Time one call per argument; returns per-call times"""
+    times = []
+    for arg in args:
+        start = time.perf_counter()
+        func(*arg)
+        times.append(time.perf_counter() - start)
+    return times
+
+def _peak_memory(func):
+    """Peak bytes allocated by a single call"""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+def _result(size, operation, times, peak_bytes=None):
+    return {
+        'size': size,
+        'operation': operation,
+        'calls': len(times),
+        'mean_s': statistics.fmean(times),
+        'median_s': statistics.median(times),
+        'min_s': min(times),
+        'max_s': max(times),
+        'peak_bytes': peak_bytes
+    }
+
+def run_size(size, seed=0, track_memory=True):
+    results = []
+    rnd = random.Random(seed + 1)
+    measure = _peak_memory if track_memory else (lambda func: None)
+
+    start = time.perf_counter()
+    tracker = build_tracker(size, seed)
+    results.append(_result(size, 'add_matches (build)', [time.perf_counter() - start],
+                           measure(lambda: build_tracker(size, seed)) if track_memory and size <= 100000 else None))
+    deck = max(tracker.decks, key=lambda name: tracker.get_deck_stats(name)[name]['wins'])
+
+    times = _time_each(tracker.add_match, [(rnd.choice(DECKS), rnd.choice(ARCHETYPES), rnd.random() < 0.5, 'bench')
+                                           for _ in range(SINGLE_OPS)])
+    results.append(_result(size, 'add_match', times, measure(lambda: tracker.add_match(deck, 'Mew ex', True))))
+
+    ids = rnd.sample(sorted(tracker._matches), min(SINGLE_OPS, len(tracker)))
+    times = _time_each(tracker.edit_match, [(match_id, rnd.choice(DECKS), rnd.choice(ARCHETYPES), True, 'edited')
+                                            for match_id in ids])
+    results.append(_result(size, 'edit_match', times, measure(lambda: tracker.edit_match(ids[0], deck, 'Mew ex', False))))
+
+    times = _time_each(tracker.delete_match, [(match_id,) for match_id in ids[1:]])
+    results.append(_result(size, 'delete_match', times, measure(lambda: tracker.delete_match(ids[0]))))
+
+    results.append(_result(size, 'get_deck_stats', _time_repeated(tracker.get_deck_stats),
+                           measure(tracker.get_deck_stats)))
+    results.append(_result(size, 'get_deck_stats (one deck)', _time_repeated(lambda: tracker.get_deck_stats(deck)),
+                           measure(lambda: tracker.get_deck_stats(deck))))
+    results.append(_result(size, 'get_stats_text', _time_repeated(tracker.get_stats_text),
+                           measure(tracker.get_stats_text)))
+
+    def uncached_stats_text():
+        tracker.matchup_cache.clear()
+        return tracker.get_stats_text()
+    results.append(_result(size, 'get_stats_text (uncached)', _time_repeated(uncached_stats_text),
+                           measure(uncached_stats_text)))
+    results.append(_result(size, 'get_matchup_report', _time_repeated(tracker.get_matchup_report),
+                           measure(tracker.get_matchup_report)))
+    results.append(_result(size, 'get_all_matches', _time_repeated(tracker.get_all_matches, 10),
+                           measure(tracker.get_all_matches)))
+
+    def rename_there_and_back():
+        tracker.rename_deck(deck, deck + ' (renamed)')
+        tracker.rename_deck(deck + ' (renamed)', deck)
+    times = [t / 2 for t in _time_repeated(rename_there_and_back, 10)]
+    results.append(_result(size, 'rename_deck', times, measure(rename_there_and_back)))
+    
+    def merge_there_and_back():
+        tracker.batch_update({deck: 'Merged'}, {'Mew ex': 'Mew EX'})
+        tracker.batch_update({'Merged': deck}, {'Mew EX': 'Mew ex'})
+    times = [t / 2 for t in _time_repeated(merge_there_and_back, 10)]
+    results.append(_result(size, 'batch_update (merge)', times, measure(merge_there_and_back)))
+
+    results.append(_result(size, 'export_changes', _time_repeated(tracker.export_changes, 5),
+                           measure(tracker.export_changes)))
+    delta = tracker.export_changes()
+    results.append(_result(size, 'merge_changes (new device)',
+                           _time_repeated(lambda: PokemonDeckTracker().merge_changes(delta), 5),
+                           measure(lambda: PokemonDeckTracker().merge_changes(delta)) if size <= 100000 else None))
+    results.append(_result(size, 'merge_changes (up to date)', _time_repeated(lambda: tracker.merge_changes(delta), 5),
+                           measure(lambda: tracker.merge_changes(delta))))
+
+    def first_suggestion():
+        tracker._names = None
+        return tracker.suggest_names('opponent', 'M')
+    results.append(_result(size, 'suggest_names (first call)', _time_repeated(first_suggestion, 5),
+                           measure(first_suggestion)))
+    results.append(_result(size, 'suggest_names', _time_repeated(lambda: tracker.suggest_names('opponent', 'Ma'), 1000),
+                           measure(lambda: tracker.suggest_names('opponent', 'Ma'))))
+
+    # The newest tenth of the history, like a "last month" filter on a long record
+    tracker._sort_timeline()
+    since = tracker._times[len(tracker._times) * 9 // 10]
+    for tag in ('', ' [columnar]'):
+        if tag:
+            try:
+                start = time.perf_counter()
+                tracker.columns = ColumnarMatchStore.from_matches(tracker._matches.values())
+            except ImportError:
+                break
+            # Memory on top of the match dicts, which the tracker keeps either way
+            results.append(_result(size, 'ColumnarMatchStore (build)', [time.perf_counter() - start],
+                                   measure(lambda: ColumnarMatchStore.from_matches(tracker._matches.values()))))
+        results.append(_result(size, 'get_deck_stats (date range)' + tag,
+                               _time_repeated(lambda: tracker.get_deck_stats(None, since)),
+                               measure(lambda: tracker.get_deck_stats(None, since))))
+        results.append(_result(size, 'get_matchup_matrix (date range)' + tag,
+                               _time_repeated(lambda: tracker.get_matchup_matrix(None, since)),
+                               measure(lambda: tracker.get_matchup_matrix(None, since))))
+    tracker.columns = None
+
+    for backend in ('json', 'binary'):
+        tag = '' if backend == 'json' else ' [binary]'
+        with tempfile.TemporaryDirectory() as data_dir:
+            saved, filename = open_tracker(data_dir, backend)
+            saved._restore(tracker._snapshot_data())
+            times = _time_repeated(lambda: saved.storage.compact(saved, filename, background=False), 5)
+            results.append(_result(size, 'save_to_file (snapshot)' + tag, times,
+                                   measure(lambda: saved.storage.compact(saved, filename, background=False))))
+
+            def add_and_save():
+                saved.add_match(deck, 'Mew ex', True, 'journaled')
+                saved.save_to_file(filename)
+            results.append(_result(size, 'save_to_file (journal)' + tag, _time_repeated(add_and_save),
+                                   measure(add_and_save)))
+            saved.close()
+
+            def load():
+                loaded, _ = open_tracker(data_dir, backend)
+                loaded.load_from_file(filename)
+            results.append(_result(size, 'load_from_file' + tag, _time_repeated(load, 5),
+                                   measure(load)))
+
+    return results
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline):
+    """Print mean-time ratios against a previous results file"""
+    previous = {(r['size'], r['operation']): r for r in baseline['results']}
+    print(f"\nCompared with {baseline.get('revision') or 'baseline'}:")
+    for result in results:
+        before = previous.get((result['size'], result['operation']))
+        if before is None or not before['mean_s']:
+            continue
+        ratio = result['mean_s'] / before['mean_s']
+        flag = '  <-- slower' if ratio > 1.2 else ''
+        print(f"{result['size']:>9} {result['operation']:<37} {ratio:6.2f}x{flag}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--compare', help='previous results file to compare against')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc passes')
+    args = parser.parse_args(argv)
+
+    results = []
+    for size in args.sizes:
+        for result in run_size(size, args.seed, not args.no_memory):
+            results.append(result)
+            peak = f"{result['peak_bytes'] / 1024:10.0f} KiB" if result['peak_bytes'] is not None else ''
+            print(f"{size:>9} {result['operation']:<37} {result['mean_s'] * 1000:10.3f} ms {peak}")
+
+    report = {
+        'revision': _git_revision(),
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(results, json.load(f))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
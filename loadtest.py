@@ -0,0 +1,113 @@
+"""Load test for the HTTP stats API (python main.py serve / --api-port).
+
+Runs concurrent aiohttp clients against the stats endpoints and reports
+throughput and latency. Either point it at a running tracker or let it start
+a server on a synthetic history, optionally with a writer mutating it:
+
+    python loadtest.py --url http://127.0.0.1:8765
+    python loadtest.py --spawn 100000 --writes-per-second 5 --etag
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import threading
+import time
+
+import aiohttp
+
+from main import StatsServer
+
+ENDPOINTS = ['/stats', '/matchups', '/matches/recent?limit=25', '/stats?deck=Mewtwo+ex',
+             '/matchups?deck=Pikachu+ex&since=2024-01-01']
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+async def _client(session, base_url, deadline, use_etag, latencies, statuses, rnd):
+    etags = {}
+    while time.perf_counter() < deadline:
+        path = rnd.choice(ENDPOINTS)
+        headers = {'If-None-Match': etags[path]} if use_etag and path in etags else {}
+        start = time.perf_counter()
+        try:
+            async with session.get(base_url + path, headers=headers) as response:
+                await response.read()
+                if 'ETag' in response.headers:
+                    etags[path] = response.headers['ETag']
+                status = response.status
+        except aiohttp.ClientError as e:
+            status = type(e).__name__
+        latencies.append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+
+async def run_load(base_url, concurrency, duration, use_etag, seed=0):
+    """Hammer the API for `duration` seconds; returns (latencies, statuses, elapsed)"""
+    latencies = []
+    statuses = {}
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(*(_client(session, base_url, deadline, use_etag, latencies, statuses,
+                                       random.Random(seed + worker))
+                               for worker in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return latencies, statuses, elapsed
+
+def _writer(tracker, per_second, stop):
+    """Add matches at a steady rate so cached responses keep being invalidated"""
+    from benchmark import ARCHETYPES, DECKS
+    rnd = random.Random(1)
+    while not stop.wait(1 / per_second):
+        tracker.add_match(rnd.choice(DECKS), rnd.choice(ARCHETYPES), rnd.random() < 0.5, 'loadtest')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8765', help='base URL of a running stats API')
+    parser.add_argument('--spawn', type=int, metavar='MATCHES',
+                        help='start a server on a synthetic history of this size instead of using --url')
+    parser.add_argument('--writes-per-second', type=float, default=0,
+                        help='with --spawn, add matches at this rate during the test')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--etag', action='store_true', help='revalidate with If-None-Match like a polling overlay')
+    args = parser.parse_args(argv)
+
+    server = None
+    stop = threading.Event()
+    base_url = args.url.rstrip('/')
+    if args.spawn is not None:
+        from benchmark import build_tracker
+        tracker = build_tracker(args.spawn)
+        server = StatsServer(tracker, port=0)
+        server.start()
+        base_url = f'http://127.0.0.1:{server.port}'
+        if args.writes_per_second > 0:
+            threading.Thread(target=_writer, args=(tracker, args.writes_per_second, stop), daemon=True).start()
+
+    try:
+        latencies, statuses, elapsed = asyncio.run(run_load(base_url, args.concurrency, args.duration, args.etag))
+    finally:
+        stop.set()
+        if server is not None:
+            server.stop()
+
+    latencies.sort()
+    print(f'{len(latencies)} requests in {elapsed:.1f}s: {len(latencies) / elapsed:,.0f} req/s '
+          f'with {args.concurrency} clients')
+    print('latency ms: ' + '  '.join(f'{label} {value * 1000:.2f}' for label, value in (
+        ('mean', statistics.fmean(latencies) if latencies else 0.0),
+        ('p50', _percentile(latencies, 0.5)),
+        ('p90', _percentile(latencies, 0.9)),
+        ('p99', _percentile(latencies, 0.99)),
+        ('max', latencies[-1] if latencies else 0.0))))
+    print('responses: ' + '  '.join(f'{status}: {count}' for status, count in sorted(statuses.items(), key=str)))
+    failed = sum(count for status, count in statuses.items() if status not in (200, 304))
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
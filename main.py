@@ -1,168 +1,2805 @@
-import PySimpleGUI as sg
+from array import array
+import codecs
 import json
-from datetime import datetime
-from collections import defaultdict
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
+from collections import Counter, OrderedDict, defaultdict, deque
+from contextlib import nullcontext
+from difflib import SequenceMatcher
+from itertools import accumulate, chain
+from operator import itemgetter
+from functools import lru_cache, wraps
+import glob
+import hashlib
+import importlib.util
+from math import log2, sqrt
 import os
+import platform
+import re
+import sqlite3
+import struct
+import sys
+import threading
+import time
 
-class PokemonDeckTracker:
+# Measured from here to the first window for the status bar
+_STARTED = time.perf_counter()
+
+# PySimpleGUI is imported by main(), so headless entry points never load Tk
+sg = None
+
+JOURNAL_SUFFIX = '.journal'
+NOTES_SUFFIX = '.notes'
+JOURNAL_COMPACT_BYTES = 1024 * 1024
+STREAM_CHUNK_SIZE = 1024 * 1024
+SHARED_FIELDS = frozenset(('deck', 'opponent', 'result', 'notes'))
+SAVE_DEBOUNCE_SECONDS = 0.5
+# A failed background save is retried after this delay, doubling up to the maximum
+SAVE_RETRY_SECONDS = 1.0
+SAVE_RETRY_MAX_SECONDS = 60.0
+SAVE_CLOSE_ATTEMPTS = 3
+MATCHUP_CACHE_SIZE = 32
+API_PORT = 8765
+API_CACHE_SIZE = 256
+API_RECENT_LIMIT = 500
+# Matches copied per lock hold when another thread snapshots a range; a write in between starts the copy over
+RESULT_COPY_CHUNK = 10000
+RESULT_COPY_ATTEMPTS = 3
+# Names at least this similar (after case-folding) are suggested as duplicates
+MERGE_SIMILARITY = 0.85
+BATCH_FIELDS = ('deck', 'opponent', 'result', 'notes')
+DELTA_FORMAT = 'pokemon-deck-tracker-delta'
+DELTA_SUFFIX = '.delta.json'
+DELTA_FIELDS = ('uid', 'date', 'deck', 'opponent', 'result', 'notes', 'modified')
+SUGGESTION_LIMIT = 6
+# Input key -> (field suggested, key of the list showing suggestions)
+SUGGESTION_INPUTS = {'-DECK-': ('deck', '-DECK_SUGGESTIONS-'), '-OPPONENT-': ('opponent', '-OPPONENT_SUGGESTIONS-')}
+# Recency (seconds) worth as much as doubling a name's match count when ranking suggestions
+NAME_RECENCY_HALF_LIFE = 14 * 24 * 3600
+# Upper bounds (seconds) of the latency histogram buckets; slower calls land in a final bucket
+LATENCY_BUCKETS = (0.00001, 0.0001, 0.001, 0.01, 0.1, 1.0)
+RESULT_KEYS = {'win': 'wins', 'loss': 'losses', 'draw': 'draws'}
+DATE_FORMAT = '%Y-%m-%d %H:%M'
+EPOCH = datetime(1970, 1, 1)
+TOKEN_PATTERN = re.compile(r'\w+')
+NAME_PATTERN = re.compile(r'[\W_]+')
+QUERY_PATTERN = re.compile(r'(\w+)(\*?)')
+
+def _import_gui():
+    global sg
+    if sg is None:
+        import PySimpleGUI
+        sg = PySimpleGUI
+    return sg
+
+def _numpy():
+    """Import NumPy on first use; only the columnar store needs it"""
+    import numpy
+    return numpy
+
+@lru_cache(maxsize=65536)
+def parse_date(date):
+    """Match date string -> epoch seconds (dates repeat per minute, so this is cached)"""
+    try:
+        return int((datetime.fromisoformat(date) - EPOCH).total_seconds())
+    except ValueError:
+        return 0
+
+def _to_timestamp(value):
+    """Accept a datetime, a match date string or epoch seconds for since/until arguments"""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            # Match dates are naive local time
+            value = value.astimezone().replace(tzinfo=None)
+        return int((value - EPOCH).total_seconds())
+    if isinstance(value, int):
+        return value
+    return parse_date(value)
+
+def _now_ms():
+    return time.time_ns() // 1000000
+
+def new_uid():
+    """Random 63-bit id that names a match on every device"""
+    return int.from_bytes(os.urandom(8), 'little') >> 1
+
+def legacy_uid(match):
+    """uid for a match recorded before uids existed; every copy of the file derives the same one"""
+    digest = hashlib.blake2b(f"{match['id']}|{match['date']}".encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') >> 1
+
+def _version(entry):
+    """Sort key deciding which copy of a match wins a merge: latest edit, then deletion, then field values"""
+    if entry.get('deleted'):
+        return (entry['modified'], 1, ())
+    return (entry['modified'], 0, (entry['date'], entry['deck'], entry['opponent'], entry['result'], entry['notes']))
+
+def _sync_stamp(value):
+    """Whether a delta uid or modification time fits the signed 64-bit fields of the snapshot formats"""
+    return isinstance(value, int) and not isinstance(value, bool) and 0 <= value < 2 ** 63
+
+def _minute_bound(value):
+    """since/until rounded up to a whole minute; match dates have minute resolution, so results don't change"""
+    if value is None:
+        return None
+    return -(-_to_timestamp(value) // 60) * 60
+
+def wilson_interval(wins, games, z=1.96):
+    """95% Wilson score interval for a win rate, as fractions"""
+    if not games:
+        return 0.0, 0.0
+    rate = wins / games
+    denominator = 1 + z * z / games
+    centre = (rate + z * z / (2 * games)) / denominator
+    margin = z * sqrt(rate * (1 - rate) / games + z * z / (4 * games * games)) / denominator
+    return max(centre - margin, 0.0), min(centre + margin, 1.0)
+
+def _matchup_cell(results):
+    games = results['wins'] + results['draws'] + results['losses']
+    low, high = wilson_interval(results['wins'], games)
+    return {
+        'wins': results['wins'],
+        'draws': results['draws'],
+        'losses': results['losses'],
+        'games': games,
+        'winrate': results['wins'] / games if games else 0.0,
+        'ci_low': low,
+        'ci_high': high
+    }
+
+# Functions marked with @_instrumented; wrapped with timers only while metrics are enabled
+_INSTRUMENTED = []
+
+class Metrics:
+    """Call counts, latency histograms and bytes written, collected only while enabled"""
     def __init__(self):
-        self.matches = []
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def enable(self, enabled=True):
+        """Swap the instrumented functions for timing wrappers, or restore them"""
+        if enabled == self.enabled:
+            return
+        self.enabled = enabled
+        module = sys.modules[__name__]
+        for func in _INSTRUMENTED:
+            owner, _, name = func.__qualname__.rpartition('.')
+            setattr(getattr(module, owner) if owner else module, name, _timed(func) if enabled else func)
+    
+    def reset(self):
+        with self._lock:
+            self.calls = {}
+            self.bytes_written = {}
+            self.started = time.time()
+    
+    def record_call(self, name, elapsed):
+        with self._lock:
+            entry = self.calls.get(name)
+            if entry is None:
+                entry = self.calls[name] = {'count': 0, 'total': 0.0, 'max': 0.0,
+                                            'buckets': [0] * (len(LATENCY_BUCKETS) + 1)}
+            entry['count'] += 1
+            entry['total'] += elapsed
+            entry['max'] = max(entry['max'], elapsed)
+            entry['buckets'][bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+    
+    def record_bytes(self, name, count):
+        if self.enabled:
+            with self._lock:
+                self.bytes_written[name] = self.bytes_written.get(name, 0) + count
+    
+    def snapshot(self):
+        """Metrics as a JSON-ready dict"""
+        labels = [f'<={bound * 1000:g}ms' for bound in LATENCY_BUCKETS] + [f'>{LATENCY_BUCKETS[-1] * 1000:g}ms']
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'seconds': time.time() - self.started,
+                'calls': {name: {
+                    'count': entry['count'],
+                    'total_ms': entry['total'] * 1000,
+                    'mean_ms': entry['total'] / entry['count'] * 1000,
+                    'max_ms': entry['max'] * 1000,
+                    'histogram': dict(zip(labels, entry['buckets']))
+                } for name, entry in self.calls.items()},
+                'bytes_written': dict(self.bytes_written)
+            }
+    
+    def dump(self, filename):
+        """Write the snapshot as JSON to a file, or to stdout for '-'"""
+        if filename == '-':
+            json.dump(self.snapshot(), sys.stdout, indent=2)
+            print()
+            return
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+metrics = Metrics()
+
+def _instrumented(func):
+    """Mark a function or method for metrics; it runs unwrapped until metrics.enable()"""
+    _INSTRUMENTED.append(func)
+    return func
+
+def _timed(func):
+    name = func.__qualname__
+    
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            metrics.record_call(name, time.perf_counter() - start)
+    return wrapper
+
+def format_metrics(snapshot):
+    """Render Metrics.snapshot() for the metrics panel"""
+    if not snapshot['enabled'] and not snapshot['calls']:
+        return "Instrumentation is off."
+    lines = [f"{'call':<38}{'count':>8}{'total ms':>11}{'mean ms':>10}{'max ms':>10}"]
+    for name, entry in sorted(snapshot['calls'].items(), key=lambda item: -item[1]['total_ms']):
+        lines.append(f"{name:<38}{entry['count']:>8}{entry['total_ms']:>11.1f}"
+                     f"{entry['mean_ms']:>10.3f}{entry['max_ms']:>10.1f}")
+        lines.append('    ' + '  '.join(f'{label} {count}' for label, count in entry['histogram'].items() if count))
+    if snapshot['bytes_written']:
+        lines.append('')
+        lines.append('Bytes written:')
+        for name, count in sorted(snapshot['bytes_written'].items()):
+            lines.append(f'    {name:<34}{count:>12,}')
+    return '\n'.join(lines)
+
+def _synchronized(method):
+    """Run a tracker method under the tracker lock shared with the background writer"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+def _new_deck_stats():
+    return defaultdict(lambda: {'wins': 0, 'losses': 0, 'draws': 0, 'matchups': defaultdict(lambda: {'wins': 0, 'losses': 0, 'draws': 0})})
+
+_RESULT_FIELDS = itemgetter('deck', 'opponent', 'result')
+
+def _count_results(rows):
+    """W/L/D per deck and matchup from (deck, opponent, result) rows"""
+    stats = _new_deck_stats()
+    for deck, opponent, result in rows:
+        if result == 'win':
+            stats[deck]['wins'] += 1
+            stats[deck]['matchups'][opponent]['wins'] += 1
+        elif result == 'loss':
+            stats[deck]['losses'] += 1
+            stats[deck]['matchups'][opponent]['losses'] += 1
+        else:
+            stats[deck]['draws'] += 1
+            stats[deck]['matchups'][opponent]['draws'] += 1
+    return stats
+
+def format_stats(stats):
+    """Render get_deck_stats() output as the text shown by Show Stats, decks and matchups sorted by name"""
+    text = ""
+    
+    for deck in sorted(stats):
+        total_matches = stats[deck]['wins'] + stats[deck]['losses'] + stats[deck]['draws']
+        winrate = (stats[deck]['wins'] / total_matches * 100) if total_matches > 0 else 0
+        
+        text += f"\n=== Stats for deck: {deck} ===\n"
+        text += f"Overall record: {stats[deck]['wins']}-{stats[deck]['draws']}-{stats[deck]['losses']} ({winrate:.1f}%)\n\n"
+        text += "Matchups:\n"
+        
+        for opponent, results in sorted(stats[deck]['matchups'].items()):
+            matchup_matches = results['wins'] + results['losses'] + results['draws']
+            matchup_winrate = (results['wins'] / matchup_matches * 100) if matchup_matches > 0 else 0
+            text += f"- vs {opponent}: {results['wins']}-{results['draws']}-{results['losses']} ({matchup_winrate:.1f}%)\n"
+    
+    return text
+
+def _name_key(name):
+    """Case-folded name with punctuation and repeated spaces collapsed"""
+    return NAME_PATTERN.sub(' ', name.casefold()).strip()
+
+def find_near_duplicates(counts, cutoff=MERGE_SIMILARITY):
+    """Group names that only differ in case, punctuation, a trailing "ex" or a typo.
+    
+    counts maps each name to how often it is used; the most used name of a
+    group is suggested as the one to keep. Returns [(keep, [variants])].
+    """
+    keys = {name: _name_key(name) for name in counts}
+    # "Mewtwo" and "Mewtwo ex" are one deck however short the name is
+    bases = {name: key[:-3] if key.endswith(' ex') else key for name, key in keys.items()}
+    order = sorted(counts, key=lambda name: (-counts[name], name))
+    matcher = SequenceMatcher(autojunk=False)
+    grouped = set()
+    groups = []
+    for keep in order:
+        if keep in grouped:
+            continue
+        grouped.add(keep)
+        matcher.set_seq2(keys[keep])
+        variants = []
+        for name in order:
+            if name == keep or name in grouped:
+                continue
+            matcher.set_seq1(keys[name])
+            if bases[name] == bases[keep] or (matcher.real_quick_ratio() >= cutoff and
+                                            matcher.quick_ratio() >= cutoff and matcher.ratio() >= cutoff):
+                variants.append(name)
+        if variants:
+            grouped.update(variants)
+            groups.append((keep, variants))
+    return groups
+
+class PokemonDeckTracker:
+    def __init__(self, storage=None, verify_stats=False, columnar=False):
+        # id -> match, in insertion order
+        self._matches = {}
+        self._next_id = 0
         self.decks = set()
         self.archetypes = set()
         self.last_used_deck = None
+        self.storage = storage if storage is not None else JsonStorage()
+        # Guards mutations against a save running on another thread
+        self.lock = threading.RLock()
+        self.verify_stats = verify_stats
+        self._journal_seq = 0
+        # deck -> W/L/D totals and per-opponent matchups, kept current by every mutation
+        self._stats = {}
+        self._archetype_counts = {}
+        # Optional NumPy mirror of the history for vectorized matrix queries
+        self.columns = ColumnarMatchStore() if columnar else None
+        # Match ids ordered by (timestamp, id); out-of-order bulk inserts are sorted on next use
+        self._times = []
+        self._time_ids = []
+        self._timeline_sorted = True
+        self.notes_index = NotesIndex()
+        self.matchup_cache = MatchupCache()
+        # Bumped by every mutation and reload; readers compare it to spot stale copies
+        self.version = 0
+        # uid -> tombstone of a deleted match, so deletions reach other devices
+        self._tombstones = {}
+        # uid -> match or tombstone in seq order; built by the first sync and kept current from then on
+        self._sync_index = None
+        # (deck NameIndex, archetype NameIndex); built by the first suggestion and kept current from then on
+        self._names = None
+    
+    @property
+    def matches(self):
+        return list(self._matches.values())
+    
+    @matches.setter
+    def matches(self, matches):
+        self._ensure_match_ids(matches)
+        self._matches = {match['id']: match for match in matches}
+    
+    def __len__(self):
+        return len(self._matches)
         
+    @_instrumented
+    @_synchronized
     def add_match(self, my_deck, opponent_archetype, won, notes=""):
         match = {
             'id': self._get_next_id(),
-            'date': datetime.now().strftime('%Y-%m-%d %H:%M'),
+            'date': datetime.now().strftime(DATE_FORMAT),
             'deck': my_deck,
             'opponent': opponent_archetype,
             'result': 'draw' if won is None else ('win' if won else 'loss'),
-            'notes': notes
+            'notes': notes,
+            'uid': new_uid(),
+            'seq': self._journal_seq + 1,
+            'modified': _now_ms()
         }
-        self.matches.append(match)
+        self._next_id = match['id'] + 1
+        self._matches[match['id']] = match
+        self._track(match)
+        self._count_match(match, 1)
+        self._index_time(match)
+        self.notes_index.add(match)
+        self.matchup_cache.invalidate(my_deck, parse_date(match['date']))
+        if self.columns is not None:
+            self.columns.append(match)
         self.decks.add(my_deck)
         self.archetypes.add(opponent_archetype)
+        self._rank_names({my_deck: match['date']}, {opponent_archetype: match['date']})
         self.last_used_deck = my_deck
+        self._log_op('add', match=dict(match))
         return match['id']
     
+    @_instrumented
+    @_synchronized
+    def add_matches(self, rows):
+        """Add a batch of matches in one step and return their ids.
+        
+        Each row is a dict with deck, opponent, result ('win'/'loss'/'draw') and
+        optional notes and date. Ids, collections, indexes and the journal are
+        updated once for the whole batch.
+        """
+        now = datetime.now().strftime(DATE_FORMAT)
+        first_id = self._next_id
+        seq = self._journal_seq + 1
+        modified = _now_ms()
+        batch = [{
+            'id': first_id + offset,
+            'date': row.get('date') or now,
+            'deck': row['deck'],
+            'opponent': row['opponent'],
+            'result': row['result'],
+            'notes': row.get('notes') or '',
+            'uid': new_uid(),
+            'seq': seq,
+            'modified': modified
+        } for offset, row in enumerate(rows)]
+        if not batch:
+            return []
+        
+        self._next_id = first_id + len(batch)
+        for match in batch:
+            self._matches[match['id']] = match
+            self._count_match(match, 1)
+            self.notes_index.add(match)
+            self._track(match)
+        self._index_times(batch)
+        for deck in {match['deck'] for match in batch}:
+            self.matchup_cache.invalidate(deck)
+        if self.columns is not None:
+            self.columns.extend(batch)
+        deck_dates = {}
+        archetype_dates = {}
+        if self._names is not None:
+            for match in batch:
+                deck_dates[match['deck']] = max(deck_dates.get(match['deck'], ''), match['date'])
+                archetype_dates[match['opponent']] = max(archetype_dates.get(match['opponent'], ''), match['date'])
+        self._update_collections(deck_dates, archetype_dates)
+        self._log_op('add_batch', matches=[dict(match) for match in batch])
+        return [match['id'] for match in batch]
+    
     def _get_next_id(self):
         """Get next available ID for a match"""
-        if not self.matches:
-            return 0
-        return max(match.get('id', 0) for match in self.matches) + 1
-        
-    def _ensure_match_ids(self):
-        """Ensure all matches have an ID"""
-        next_id = 0
-        for match in self.matches:
+        return self._next_id
+        
+    def _ensure_match_ids(self, matches):
+        """Ensure all matches have an ID and move the id counter past them"""
+        next_id = self._next_id
+        for match in matches:
+            if 'id' in match:
+                next_id = max(next_id, match['id'] + 1)
+        for match in matches:
             if 'id' not in match:
                 match['id'] = next_id
                 next_id += 1
-            else:
-                next_id = max(next_id, match['id'] + 1)
+        self._next_id = next_id
     
+    @_instrumented
+    @_synchronized
     def edit_match(self, match_id, my_deck, opponent_archetype, won, notes=""):
-        for match in self.matches:
-            if match.get('id') == match_id:
-                old_deck = match['deck']
-                old_opponent = match['opponent']
-                
-                match['deck'] = my_deck
-                match['opponent'] = opponent_archetype
-                match['result'] = 'win' if won else 'loss'
-                match['notes'] = notes
-                
-                self._update_collections()
-                return True
-        return False
+        match = self._matches.get(match_id)
+        if match is None:
+            return False
+        self._count_match(match, -1)
+        self.notes_index.remove(match)
+        self.matchup_cache.invalidate(match['deck'], parse_date(match['date']))
+        self.matchup_cache.invalidate(my_deck, parse_date(match['date']))
+        old_deck, old_opponent = match['deck'], match['opponent']
+        match['deck'] = my_deck
+        match['opponent'] = opponent_archetype
+        match['result'] = 'draw' if won is None else ('win' if won else 'loss')
+        match['notes'] = notes
+        modified = self._stamp(match)
+        self._count_match(match, 1)
+        self.notes_index.add(match)
+        if self.columns is not None:
+            self.columns.update(match)
+        
+        self._update_collections({old_deck: None, my_deck: match['date']},
+                                 {old_opponent: None, opponent_archetype: match['date']})
+        self._log_op('edit', id=match_id, deck=my_deck, opponent=opponent_archetype,
+                     result=match['result'], notes=notes, modified=modified)
+        return True
     
+    @_instrumented
+    @_synchronized
     def delete_match(self, match_id):
-        self.matches = [m for m in self.matches if m.get('id') != match_id]
-        self._update_collections()
+        match = self._matches.get(match_id)
+        modified = _now_ms()
+        if match is not None:
+            self._drop_match(match)
+            self._bury(match['uid'], self._journal_seq + 1, modified)
+            self._update_collections({match['deck']: None}, {match['opponent']: None})
+        self._log_op('delete', id=match_id, modified=modified)
+    
+    def _drop_match(self, match):
+        """Remove a match from the history and every index"""
+        del self._matches[match['id']]
+        self._count_match(match, -1)
+        if self.columns is not None:
+            self.columns.remove(match['id'])
+        self._unindex_time(match)
+        self.notes_index.remove(match)
+        self.matchup_cache.invalidate(match['deck'], parse_date(match['date']))
     
-    def _update_collections(self):
-        """Update decks and archetypes sets based on current matches"""
-        self.decks = set(match['deck'] for match in self.matches)
-        self.archetypes = set(match['opponent'] for match in self.matches)
+    def _update_collections(self, decks=None, archetypes=None):
+        """Update decks and archetypes sets based on current matches.
+        
+        decks and archetypes map the names a change touched to the date they
+        were used, or None, and are re-ranked for autocomplete.
+        """
+        self.decks = set(self._stats)
+        self.archetypes = set(self._archetype_counts)
+        self._rank_names(decks, archetypes)
+    
+    def _deck_count(self, deck, default=0):
+        stats = self._stats.get(deck)
+        return stats['wins'] + stats['losses'] + stats['draws'] if stats else default
+    
+    def _rank_names(self, decks=None, archetypes=None):
+        """Update the autocomplete indexes, if built, for names whose match counts changed"""
+        if self._names is None:
+            return
+        for name, date in (decks or {}).items():
+            self._names[0].update(name, self._deck_count(name), date)
+        for name, date in (archetypes or {}).items():
+            self._names[1].update(name, self._archetype_counts.get(name, 0), date)
+    
+    def _name_indexes(self):
+        """(deck NameIndex, archetype NameIndex), built on first use"""
+        if self._names is None:
+            deck_last = {}
+            archetype_last = {}
+            missing = len(self._stats) + len(self._archetype_counts)
+            # Newest first, so most names are found long before the oldest match
+            for match in self._iter_timeline(reverse=True):
+                if not missing:
+                    break
+                if match['deck'] not in deck_last:
+                    deck_last[match['deck']] = match['date']
+                    missing -= 1
+                if match['opponent'] not in archetype_last:
+                    archetype_last[match['opponent']] = match['date']
+                    missing -= 1
+            self._names = (NameIndex.from_uses({deck: (self._deck_count(deck), deck_last.get(deck))
+                                                for deck in self._stats}),
+                           NameIndex.from_uses({opponent: (count, archetype_last.get(opponent))
+                                                for opponent, count in self._archetype_counts.items()}))
+        return self._names
+    
+    @_synchronized
+    def suggest_names(self, field, prefix, limit=SUGGESTION_LIMIT):
+        """Deck (field 'deck') or archetype ('opponent') names starting with prefix, case-insensitively.
+        
+        The most played and most recently used names come first.
+        """
+        decks, archetypes = self._name_indexes()
+        return (decks if field == 'deck' else archetypes).suggest(prefix, limit)
+    
+    def _stamp(self, match, modified=None, seq=None):
+        """Mark a match as changed by the op about to be logged; returns its modification time"""
+        match['seq'] = self._journal_seq + 1 if seq is None else seq
+        match['modified'] = _now_ms() if modified is None else modified
+        self._track(match)
+        return match['modified']
+    
+    def _bury(self, uid, seq, modified):
+        """Leave a tombstone for a deleted match"""
+        tombstone = self._tombstones[uid] = {'uid': uid, 'seq': seq, 'modified': modified, 'deleted': True}
+        self._track(tombstone)
+    
+    def _track(self, entry):
+        """Move a changed match or tombstone to the end of the sync index"""
+        if self._sync_index is not None:
+            self._sync_index.pop(entry['uid'], None)
+            self._sync_index[entry['uid']] = entry
+    
+    def _count_match(self, match, delta):
+        """Add (+1) or remove (-1) one match from the stats aggregate"""
+        self._count_result(match['deck'], match['opponent'], match['result'], delta)
+    
+    def _count_result(self, deck, opponent, result, delta):
+        key = RESULT_KEYS.get(result, 'draws')
+        
+        deck_stats = self._stats.get(deck)
+        if deck_stats is None:
+            deck_stats = self._stats[deck] = {'wins': 0, 'losses': 0, 'draws': 0, 'matchups': {}}
+        matchup = deck_stats['matchups'].get(opponent)
+        if matchup is None:
+            matchup = deck_stats['matchups'][opponent] = {'wins': 0, 'losses': 0, 'draws': 0}
+        deck_stats[key] += delta
+        matchup[key] += delta
+        self._archetype_counts[opponent] = self._archetype_counts.get(opponent, 0) + delta
+        
+        if delta < 0:
+            if not (matchup['wins'] or matchup['losses'] or matchup['draws']):
+                del deck_stats['matchups'][opponent]
+                if not deck_stats['matchups']:
+                    del self._stats[deck]
+            if not self._archetype_counts[opponent]:
+                del self._archetype_counts[opponent]
+    
+    def _sort_timeline(self):
+        if not self._timeline_sorted:
+            timeline = sorted(zip(self._times, self._time_ids))
+            self._times = [t for t, _ in timeline]
+            self._time_ids = [i for _, i in timeline]
+            self._timeline_sorted = True
+    
+    def _time_position(self, timestamp, match_id):
+        """Position of (timestamp, match_id) in the timestamp index"""
+        self._sort_timeline()
+        start = bisect_left(self._times, timestamp)
+        end = bisect_right(self._times, timestamp, start)
+        # Ids are sorted within a run of equal timestamps, so bulk imports that share a minute stay O(log n)
+        return bisect_left(self._time_ids, match_id, start, end)
+    
+    def _index_time(self, match):
+        """Insert a match into the sorted timestamp index"""
+        timestamp = parse_date(match['date'])
+        position = self._time_position(timestamp, match['id'])
+        self._times.insert(position, timestamp)
+        self._time_ids.insert(position, match['id'])
+    
+    def _index_times(self, matches):
+        """Insert a batch into the timestamp index, appending when it is newer than everything indexed"""
+        batch = sorted((parse_date(match['date']), match['id']) for match in matches)
+        if self._times and batch[0] < (self._times[-1], self._time_ids[-1]):
+            self._timeline_sorted = False
+        self._times.extend(t for t, _ in batch)
+        self._time_ids.extend(i for _, i in batch)
+    
+    def _unindex_time(self, match):
+        timestamp = parse_date(match['date'])
+        position = self._time_position(timestamp, match['id'])
+        if position < len(self._time_ids) and self._time_ids[position] == match['id']:
+            del self._times[position]
+            del self._time_ids[position]
+    
+    def _prune_times(self):
+        """Drop ids that are no longer present after a bulk delete"""
+        live = [(t, i) for t, i in zip(self._times, self._time_ids) if i in self._matches]
+        self._times = [t for t, _ in live]
+        self._time_ids = [i for _, i in live]
+    
+    def _rebuild_indexes(self, timeline=None, notes_index=None):
+        """Recount the stats aggregate and re-sort the timestamp index after a bulk load.
+        
+        timeline is an optional list of timestamps for matches that are already
+        in (timestamp, id) order, as binary snapshots store them; notes_index is
+        a persisted NotesIndex that is known to match the loaded history.
+        """
+        self._stats = {}
+        self._archetype_counts = {}
+        grouped = Counter((match['deck'], match['opponent'], match['result']) for match in self._matches.values())
+        for (deck, opponent, result), count in grouped.items():
+            self._count_result(deck, opponent, result, count)
+        if timeline is not None:
+            self._times = list(timeline)
+            self._time_ids = list(self._matches)
+        else:
+            timeline = sorted((parse_date(match['date']), match_id) for match_id, match in self._matches.items())
+            self._times = [t for t, _ in timeline]
+            self._time_ids = [i for _, i in timeline]
+        self._timeline_sorted = True
+        self.notes_index = notes_index if notes_index is not None else NotesIndex.from_matches(self._matches.values())
+        self.matchup_cache.clear()
+        self._sync_index = None
+        self._names = None
+        self.version += 1
+        if self.columns is not None:
+            self.columns = ColumnarMatchStore.from_matches(self._matches.values())
+    
+    def _timeline_span(self, since=None, until=None):
+        """Timeline positions [start, end) of the matches with since <= date < until"""
+        self._sort_timeline()
+        start = 0 if since is None else bisect_left(self._times, _to_timestamp(since))
+        end = len(self._times) if until is None else bisect_left(self._times, _to_timestamp(until))
+        return start, end
+    
+    def _iter_timeline(self, since=None, until=None, reverse=False):
+        """Matches with since <= date < until in date order, found by bisecting the index"""
+        start, end = self._timeline_span(since, until)
+        positions = range(end - 1, start - 1, -1) if reverse else range(start, end)
+        matches = self._matches
+        time_ids = self._time_ids
+        for position in positions:
+            yield matches[time_ids[position]]
+    
+    def get_matches_page(self, page, page_size):
+        """One page of matches, newest first, without sorting the history"""
+        self._sort_timeline()
+        end = len(self._time_ids) - page * page_size
+        start = max(end - page_size, 0)
+        return [self._matches[match_id] for match_id in reversed(self._time_ids[start:max(end, 0)])]
     
     def get_match_by_id(self, match_id):
-        for match in self.matches:
-            if match.get('id') == match_id:
-                return match
-        return None
+        return self._matches.get(match_id)
     
+    @_instrumented
     def get_all_matches(self):
-        return sorted(self.matches, key=lambda x: x['date'], reverse=True)
+        return list(self._iter_timeline(reverse=True))
+    
+    @_instrumented
+    def get_deck_stats(self, deck_name=None, since=None, until=None, notes=None):
+        """W/L/D per deck and matchup, optionally for a date range and the matches a notes query finds"""
+        if notes:
+            return self._compute_deck_stats(deck_name, self._search_notes(notes, since, until))
+        if since is not None or until is not None:
+            if self.columns is None:
+                return self._compute_deck_stats(deck_name, self._iter_timeline(since, until))
+            with self.lock:
+                stats = self.columns.deck_stats(deck_name or None, None if since is None else _to_timestamp(since),
+                                                None if until is None else _to_timestamp(until))
+                if self.verify_stats and _plain_stats(stats) != _plain_stats(
+                        self._compute_deck_stats(deck_name, self._iter_timeline(since, until))):
+                    raise AssertionError(f"Column store out of sync for {deck_name or 'all decks'}")
+            return stats
+        stats = _new_deck_stats()
+        if deck_name:
+            decks = [deck_name] if deck_name in self._stats else []
+        else:
+            decks = self._stats
+        for deck in decks:
+            source = self._stats[deck]
+            target = stats[deck]
+            target['wins'] = source['wins']
+            target['losses'] = source['losses']
+            target['draws'] = source['draws']
+            for opponent, results in source['matchups'].items():
+                target['matchups'][opponent].update(results)
+        
+        if self.verify_stats:
+            self._check_stats(stats, deck_name)
+        return stats
+    
+    def _check_stats(self, stats, deck_name=None):
+        """Raise AssertionError if the aggregate disagrees with a full recompute"""
+        expected = [self._compute_deck_stats(deck_name)]
+        if hasattr(self.storage, 'deck_stats'):
+            with self.lock:
+                expected.append(self.storage.deck_stats(deck_name))
+        if self.columns is not None:
+            expected.append(self.columns.deck_stats(deck_name))
+        actual = _plain_stats(stats)
+        for reference in expected:
+            if reference is not None and _plain_stats(reference) != actual:
+                raise AssertionError(f"Stats aggregate out of sync for {deck_name or 'all decks'}")
+    
+    def _compute_deck_stats(self, deck_name=None, matches=None):
+        """Count results over the given matches (all of them by default)"""
+        if matches is None:
+            matches = self._matches.values()
+        if deck_name:
+            matches = (match for match in matches if match['deck'] == deck_name)
+        return _count_results(map(_RESULT_FIELDS, matches))
+    
+    def match_results(self, deck_name=None, since=None, until=None, notes=None):
+        """(deck, opponent, result) of the matches a stats query covers, for counting with _count_results.
+        
+        Meant for other threads: the rows are copied a chunk at a time under
+        the lock, so a long range doesn't hold up the GUI, and the copy starts
+        over if the tracker changes in between. The last attempt keeps the lock.
+        """
+        for attempt in range(RESULT_COPY_ATTEMPTS):
+            with self.lock if attempt == RESULT_COPY_ATTEMPTS - 1 else nullcontext():
+                with self.lock:
+                    version = self.version
+                    if notes:
+                        ids = [match['id'] for match in self._search_notes(notes, since, until)]
+                    else:
+                        start, end = self._timeline_span(since, until)
+                        ids = self._time_ids[start:end]
+                rows = []
+                for position in range(0, len(ids), RESULT_COPY_CHUNK):
+                    with self.lock:
+                        if self.version != version:
+                            break
+                        rows.extend(map(_RESULT_FIELDS, map(self._matches.__getitem__,
+                                                            ids[position:position + RESULT_COPY_CHUNK])))
+                else:
+                    if deck_name:
+                        rows = [row for row in rows if row[0] == deck_name]
+                    return rows
+    
+    @_instrumented
+    def get_stats_text(self, deck_name=None, since=None, until=None, notes=None):
+        if notes:
+            return format_stats(self.get_deck_stats(deck_name, since, until, notes))
+        rows = self._matchup_rows(deck_name, since, until)
+        return "".join(rows[deck]['text'] for deck in sorted(rows))
+    
+    def _search_notes(self, query, since=None, until=None):
+        """Matches found by a notes query in id order, optionally limited to since <= date < until"""
+        start = None if since is None else _to_timestamp(since)
+        end = None if until is None else _to_timestamp(until)
+        for match_id in sorted(self.notes_index.search(query)):
+            match = self._matches[match_id]
+            if start is not None or end is not None:
+                timestamp = parse_date(match['date'])
+                if (start is not None and timestamp < start) or (end is not None and timestamp >= end):
+                    continue
+            yield match
+    
+    def search_notes(self, query):
+        """Matches whose notes contain every query term ("went second", "brick*"), newest first"""
+        return sorted(self._search_notes(query), key=lambda match: (parse_date(match['date']), match['id']),
+                      reverse=True)
     
-    def get_deck_stats(self, deck_name=None):
-        stats = defaultdict(lambda: {'wins': 0, 'losses': 0, 'draws': 0, 'matchups': defaultdict(lambda: {'wins': 0, 'losses': 0, 'draws': 0})})
+    def get_rolling_winrate(self, deck_name, window=20):
+        """Win rate over a sliding window of games (int) or time (timedelta).
         
-        for match in self.matches:
-            if deck_name and match['deck'] != deck_name:
+        Returns {'overall': [(date, winrate), ...], 'matchups': {opponent: [...]}}
+        with one point per match, built in a single pass over the timestamp index.
+        Raises ValueError unless the window is at least one game or one second.
+        """
+        by_time = isinstance(window, timedelta)
+        span = int(window.total_seconds()) if by_time else window
+        if span < 1:
+            raise ValueError(f'Rolling window must be at least one {"second" if by_time else "game"}, got {window!r}')
+        windows = {}
+        series = {'overall': [], 'matchups': defaultdict(list)}
+        
+        for match in self._iter_timeline():
+            if match['deck'] != deck_name:
                 continue
-                
-            deck = match['deck']
-            opponent = match['opponent']
-            result = match['result']
-            
-            if result == 'win':
-                stats[deck]['wins'] += 1
-                stats[deck]['matchups'][opponent]['wins'] += 1
-            elif result == 'loss':
-                stats[deck]['losses'] += 1
-                stats[deck]['matchups'][opponent]['losses'] += 1
-            else:  
-                stats[deck]['draws'] += 1
-                stats[deck]['matchups'][opponent]['draws'] += 1
+            timestamp = parse_date(match['date'])
+            won = match['result'] == 'win'
+            for key, points in ((None, series['overall']), (match['opponent'], series['matchups'][match['opponent']])):
+                recent = windows.get(key)
+                if recent is None:
+                    recent = windows[key] = [deque(), 0]
+                recent[0].append((timestamp, won))
+                recent[1] += won
+                while (recent[0][0][0] <= timestamp - span) if by_time else (len(recent[0]) > span):
+                    recent[1] -= recent[0].popleft()[1]
+                points.append((match['date'], recent[1] / len(recent[0]) * 100))
         
-        return stats
+        series['matchups'] = dict(series['matchups'])
+        return series
     
-    def get_stats_text(self, deck_name=None):
-        stats = self.get_deck_stats(deck_name)
-        text = ""
+    def _matchup_rows(self, deck_name=None, since=None, until=None):
+        """Cached deck -> row (stats, Show Stats text, matchup cells) for a deck filter and date range"""
+        since = _minute_bound(since)
+        until = _minute_bound(until)
+        key = (deck_name or None, since, until)
+        with self.lock:
+            entry = self.matchup_cache.lookup(key)
+            if entry is None:
+                entry = self.matchup_cache.store(key, self._compute_matchup_rows(deck_name or None, since, until))
+            elif entry['stale']:
+                stale = entry['stale']
+                entry['stale'] = set()
+                for deck in stale:
+                    entry['rows'].pop(deck, None)
+                entry['rows'].update(self._compute_matchup_rows(stale, since, until))
+            if self.verify_stats:
+                cached = {deck: row['stats'] for deck, row in entry['rows'].items()}
+                if _plain_stats(cached) != _plain_stats(self.get_deck_stats(deck_name, since, until)):
+                    raise AssertionError(f"Matchup cache out of sync for {key}")
+            return entry['rows']
+    
+    def _compute_matchup_rows(self, decks, since, until):
+        """Rows for one deck name, a set of decks or all decks (None)"""
+        if isinstance(decks, str):
+            decks = {decks}
+        if since is None and until is None:
+            stats = {deck: {'wins': source['wins'], 'losses': source['losses'], 'draws': source['draws'],
+                            'matchups': {opponent: dict(results) for opponent, results in source['matchups'].items()}}
+                     for deck, source in self._stats.items() if decks is None or deck in decks}
+        elif self.columns is not None:
+            stats = self.columns.deck_stats(decks, since, until)
+        else:
+            matches = self._iter_timeline(since, until)
+            if decks is not None:
+                matches = (match for match in matches if match['deck'] in decks)
+            stats = self._compute_deck_stats(None, matches)
+        return {deck: {
+            'stats': deck_stats,
+            'text': format_stats({deck: deck_stats}),
+            'total': _matchup_cell(deck_stats),
+            'cells': {opponent: _matchup_cell(results) for opponent, results in deck_stats['matchups'].items()}
+        } for deck, deck_stats in stats.items()}
+    
+    @_instrumented
+    def get_matchup_report(self, deck_name=None, since=None, until=None):
+        """Deck x archetype matrix with win rates, Wilson intervals and sample counts.
         
-        for deck in stats:
-            total_matches = stats[deck]['wins'] + stats[deck]['losses'] + stats[deck]['draws']
-            winrate = (stats[deck]['wins'] / total_matches * 100) if total_matches > 0 else 0
-            
-            text += f"\n=== Stats for deck: {deck} ===\n"
-            text += f"Overall record: {stats[deck]['wins']}-{stats[deck]['draws']}-{stats[deck]['losses']} ({winrate:.1f}%)\n\n"
-            text += "Matchups:\n"
-            
-            for opponent, results in stats[deck]['matchups'].items():
-                matchup_matches = results['wins'] + results['losses'] + results['draws']
-                matchup_winrate = (results['wins'] / matchup_matches * 100) if matchup_matches > 0 else 0
-                text += f"- vs {opponent}: {results['wins']}-{results['draws']}-{results['losses']} ({matchup_winrate:.1f}%)\n"
+        Returns {'decks', 'archetypes', 'cells': {deck: {archetype: cell}}, 'totals': {deck: cell}}
+        where a cell holds wins, draws, losses, games, winrate, ci_low and ci_high.
+        Served from the matchup cache; treat the cells as read-only.
+        """
+        rows = self._matchup_rows(deck_name, since, until)
+        decks = sorted(rows)
+        return {
+            'decks': decks,
+            'archetypes': sorted({opponent for row in rows.values() for opponent in row['cells']}),
+            'cells': {deck: rows[deck]['cells'] for deck in decks},
+            'totals': {deck: rows[deck]['total'] for deck in decks}
+        }
+    
+    def get_matchup_matrix(self, deck_name=None, since=None, until=None):
+        """Return (decks, archetypes, counts) where counts[d][a] is [wins, draws, losses]
         
-        return text
+        Date ranges are counted from the column store when it is kept; the
+        whole history comes from the cached per-deck aggregates.
+        """
+        if self.columns is not None and (since is not None or until is not None):
+            with self.lock:
+                counts = self.columns.matchup_matrix(deck_name or None,
+                                                     None if since is None else _to_timestamp(since),
+                                                     None if until is None else _to_timestamp(until))
+            names = self.columns.deck_names
+            live_decks = sorted(counts.sum(axis=(1, 2)).nonzero()[0], key=lambda code: names[code])
+            names = self.columns.opponent_names
+            live_archetypes = sorted(counts.sum(axis=(0, 2)).nonzero()[0], key=lambda code: names[code])
+            counts = counts[live_decks][:, live_archetypes]
+            return ([self.columns.deck_names[code] for code in live_decks],
+                    [self.columns.opponent_names[code] for code in live_archetypes],
+                    counts.tolist())
+        report = self.get_matchup_report(deck_name, since, until)
+        counts = []
+        for deck in report['decks']:
+            cells = report['cells'][deck]
+            counts.append([[cells[a]['wins'], cells[a]['draws'], cells[a]['losses']]
+                           if a in cells else [0, 0, 0] for a in report['archetypes']])
+        return report['decks'], report['archetypes'], counts
         
+    @_synchronized
     def rename_deck(self, old_name, new_name):
         """Přejmenuje balíček a aktualizuje všechny související záznamy"""
         if new_name in self.decks:
             return False, "Deck with this name already exists"
         if old_name not in self.decks:
             return False, "Original deck not found"
-        for match in self.matches:
+        modified = _now_ms()
+        for match in self._matches.values():
             if match['deck'] == old_name:
                 match['deck'] = new_name
+                self._stamp(match, modified)
+        if old_name in self._stats:
+            self._stats[new_name] = self._stats.pop(old_name)
+        self.matchup_cache.invalidate(old_name)
+        self.matchup_cache.invalidate(new_name)
+        if self.columns is not None:
+            self.columns.rename_deck(old_name, new_name)
         self.decks.remove(old_name)
         self.decks.add(new_name)
+        if self._names is not None:
+            self._names[0].rename(old_name, new_name, self._deck_count(new_name))
+        self._log_op('rename_deck', old=old_name, new=new_name, modified=modified)
         return True, "Deck renamed successfully"
     
+    @_synchronized
     def delete_deck(self, deck_name):
         """Smaže balíček a všechny jeho zápasy"""
         if deck_name not in self.decks:
             return False, "Deck not found"
-        self.matches = [m for m in self.matches if m['deck'] != deck_name]
-        self._update_collections()
+        modified = _now_ms()
+        for match in self._matches.values():
+            if match['deck'] == deck_name:
+                self.notes_index.remove(match)
+                self._bury(match['uid'], self._journal_seq + 1, modified)
+        self._matches = {i: m for i, m in self._matches.items() if m['deck'] != deck_name}
+        self.matchup_cache.invalidate(deck_name)
+        removed = self._stats.pop(deck_name, None)
+        opponents = {}
+        if removed is not None:
+            for opponent, results in removed['matchups'].items():
+                self._archetype_counts[opponent] -= results['wins'] + results['losses'] + results['draws']
+                if not self._archetype_counts[opponent]:
+                    del self._archetype_counts[opponent]
+                opponents[opponent] = None
+        if self.columns is not None:
+            self.columns.delete_deck(deck_name)
+        self._prune_times()
+        self._update_collections({deck_name: None}, opponents)
+        self._log_op('delete_deck', deck=deck_name, modified=modified)
         return True, "Deck and its matches deleted successfully"
     
+    @_instrumented
+    @_synchronized
+    def batch_update(self, decks=None, archetypes=None, where=None, changes=None):
+        """Rename or merge decks and archetypes and bulk-edit matches in one pass.
+        
+        decks and archetypes map old names to new ones; mapping several names
+        to one merges them. changes (deck, opponent, result, notes) are then
+        applied to the matches selected by where, a dict of deck, opponent,
+        result, since, until and notes (a notes query) checked against the
+        renamed names. Stats, indexes and the journal are updated once.
+        """
+        decks = {old: new for old, new in (decks or {}).items() if old != new}
+        archetypes = {old: new for old, new in (archetypes or {}).items() if old != new}
+        changes = dict(changes or {})
+        where = dict(where or {})
+        if not all(decks.values()) or not all(archetypes.values()):
+            return False, "New names cannot be empty"
+        if any(field not in BATCH_FIELDS for field in changes):
+            return False, f"Only {', '.join(BATCH_FIELDS)} can be changed"
+        if 'result' in changes and changes['result'] not in RESULT_KEYS:
+            return False, "Result must be win, loss or draw"
+        if not changes.get('deck', True) or not changes.get('opponent', True):
+            return False, "Deck and opponent cannot be empty"
+        
+        candidates = None
+        if changes:
+            since, until = where.get('since'), where.get('until')
+            if where.get('notes'):
+                candidates = {match['id'] for match in self._search_notes(where['notes'], since, until)}
+            elif since is not None or until is not None:
+                candidates = {match['id'] for match in self._iter_timeline(since, until)}
+        
+        if decks or archetypes or candidates is None:
+            matches = self._matches.values()
+        else:
+            # Nothing to rename, so only the matches the dates or notes picked can change
+            matches = [self._matches[match_id] for match_id in sorted(candidates)]
+        touched, changed, ids, deltas, old_notes = self._batch_pass(matches, decks, archetypes, changes,
+                                                                    candidates, where)
+        if not changed:
+            return False, "No matches to update"
+        
+        modified = _now_ms()
+        for match in touched:
+            self._stamp(match, modified)
+        for match_id, notes in old_notes.items():
+            self.notes_index.remove({'id': match_id, 'notes': notes})
+            self.notes_index.add(self._matches[match_id])
+        if self.columns is not None:
+            for match in touched:
+                self.columns.update(match)
+        for (deck, opponent, result), delta in deltas.items():
+            if delta:
+                self._count_result(deck, opponent, result, delta)
+            self.matchup_cache.invalidate(deck)
+        if self._names is not None:
+            # Merged names keep the latest use of any of their old names
+            for index, renames, counts in ((self._names[0], decks, self._deck_count),
+                                           (self._names[1], archetypes, self._archetype_counts.get)):
+                for old, new in renames.items():
+                    index.rename(old, new, counts(new, 0))
+        self._update_collections({deck: None for deck, _, _ in deltas}, {opponent: None for _, opponent, _ in deltas})
+        if self.last_used_deck is not None:
+            self.last_used_deck = decks.get(self.last_used_deck, self.last_used_deck)
+        self._log_op('batch', decks=decks, archetypes=archetypes, ids=ids, changes=changes, modified=modified)
+        return True, f"{changed} matches updated"
+    
+    def _batch_pass(self, matches, decks, archetypes, changes, candidates=None, where=None):
+        """Rewrite matches in place.
+        
+        changes go to the renamed matches that agree with the deck, opponent
+        and result of where and are among the candidate ids, if given. Returns
+        the renamed or selected matches, how many of them changed, the ids
+        selected for changes, the stats delta per (deck, opponent, result) and
+        the old notes of edited notes. Nothing new is kept per match, so large
+        passes don't keep waking the garbage collector.
+        """
+        touched = []
+        changed = 0
+        ids = []
+        deltas = Counter()
+        old_notes = {}
+        where = where or {}
+        want_deck, want_opponent, want_result = where.get('deck'), where.get('opponent'), where.get('result')
+        for match in matches:
+            deck, opponent = match['deck'], match['opponent']
+            renamed = deck in decks or opponent in archetypes
+            if renamed:
+                match['deck'] = decks.get(deck, deck)
+                match['opponent'] = archetypes.get(opponent, opponent)
+            result, notes = match['result'], match['notes']
+            if (changes and (candidates is None or match['id'] in candidates)
+                    and (not want_deck or match['deck'] == want_deck)
+                    and (not want_opponent or match['opponent'] == want_opponent)
+                    and (not want_result or match['result'] == want_result)):
+                match.update(changes)
+                ids.append(match['id'])
+            elif not renamed:
+                continue
+            touched.append(match)
+            after = (match['deck'], match['opponent'], match['result'])
+            if after != (deck, opponent, result) or match['notes'] != notes:
+                deltas[(deck, opponent, result)] -= 1
+                deltas[after] += 1
+                if match['notes'] != notes:
+                    old_notes[match['id']] = notes
+                changed += 1
+        return touched, changed, ids, deltas, old_notes
+    
+    def suggest_merges(self, cutoff=MERGE_SIMILARITY):
+        """Near-duplicate deck and archetype names as {'decks': groups, 'archetypes': groups}"""
+        with self.lock:
+            deck_counts = {deck: stats['wins'] + stats['losses'] + stats['draws']
+                           for deck, stats in self._stats.items()}
+            archetype_counts = dict(self._archetype_counts)
+        return {'decks': find_near_duplicates(deck_counts, cutoff),
+                'archetypes': find_near_duplicates(archetype_counts, cutoff)}
+    
+    def _sync_entries(self):
+        """uid -> match or tombstone in seq order, sorted once on first use"""
+        if self._sync_index is None:
+            entries = sorted(chain(self._matches.values(), self._tombstones.values()), key=itemgetter('seq'))
+            self._sync_index = {entry['uid']: entry for entry in entries}
+        return self._sync_index
+    
+    @_instrumented
+    @_synchronized
+    def export_changes(self, since=-1):
+        """Everything changed after sequence number since, as a delta for merge_changes on another device.
+        
+        Only matches and tombstones changed since then are visited (newest
+        first, from the sync index); since=-1 exports the whole history.
+        """
+        index = self._sync_entries()
+        if since < 0:
+            changes = list(index.values())
+        else:
+            changes = []
+            for uid in reversed(index):
+                entry = index[uid]
+                if entry['seq'] <= since:
+                    break
+                changes.append(entry)
+            changes.reverse()
+        row = itemgetter(*DELTA_FIELDS)
+        return {
+            'format': DELTA_FORMAT,
+            'since': since,
+            'seq': self._journal_seq,
+            'fields': list(DELTA_FIELDS),
+            'matches': [row(entry) for entry in changes if not entry.get('deleted')],
+            'deleted': [[entry['uid'], entry['modified']] for entry in changes if entry.get('deleted')]
+        }
+    
+    @_instrumented
+    @_synchronized
+    def merge_changes(self, delta):
+        """Apply a delta exported by another device and return (success, message).
+        
+        For every uid the copy with the latest modification time wins, then a
+        deletion, then the greater field values, so devices that merge each
+        other's deltas in any order end up with the same history. Matches new
+        to this device get the next free ids in (date, uid) order.
+        """
+        index = self._sync_entries()
+        try:
+            if delta.get('format') != DELTA_FORMAT:
+                raise ValueError
+            incoming = []
+            for row in delta['matches']:
+                entry = dict(zip(delta.get('fields', DELTA_FIELDS), row))
+                local = index.get(entry['uid'])
+                if local is None or _version(entry) > _version(local):
+                    incoming.append(entry)
+            for entry in incoming:
+                # parse_date falls back to 0 for bad dates; a delta must carry real ones
+                datetime.strptime(entry['date'], DATE_FORMAT)
+                if entry['result'] not in RESULT_KEYS or not _sync_stamp(entry['uid']) or \
+                        not _sync_stamp(entry['modified']) or not entry['deck'] or not entry['opponent'] or \
+                        not isinstance(entry['notes'], str):
+                    raise ValueError
+            incoming.sort(key=lambda entry: (entry['date'], entry['uid']))
+            for uid, modified in delta['deleted']:
+                if not _sync_stamp(uid) or not _sync_stamp(modified):
+                    raise ValueError
+                entry = {'uid': uid, 'modified': modified, 'deleted': True}
+                local = index.get(uid)
+                if local is None or _version(entry) > _version(local):
+                    incoming.append(entry)
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return False, "Not a valid deck tracker delta"
+        
+        seq = self._journal_seq + 1
+        merged = []
+        added = []
+        deleted = []
+        stale = set()
+        deck_dates = {}
+        archetype_dates = {}
+        for entry in incoming:
+            local = index.get(entry['uid'])
+            if local is not None and _version(entry) <= _version(local):
+                continue
+            live = local is not None and not local.get('deleted')
+            if live:
+                deck_dates.setdefault(local['deck'], None)
+                archetype_dates.setdefault(local['opponent'], None)
+            if entry.get('deleted'):
+                if live:
+                    self._drop_match(local)
+                deleted.append([entry['uid'], local['id'] if live else None, entry['modified']])
+                self._bury(entry['uid'], seq, entry['modified'])
+                continue
+            if live:
+                match = local
+                self._count_match(match, -1)
+                self.notes_index.remove(match)
+                stale.add(match['deck'])
+                if match['date'] != entry['date']:
+                    self._unindex_time(match)
+                    match['date'] = entry['date']
+                    self._index_time(match)
+                for field in BATCH_FIELDS:
+                    match[field] = entry[field]
+                if self.columns is not None:
+                    self.columns.update(match)
+            else:
+                self._tombstones.pop(entry['uid'], None)
+                match = {field: entry[field] for field in ('date', 'deck', 'opponent', 'result', 'notes', 'uid')}
+                match['id'] = self._next_id
+                self._next_id += 1
+                self._matches[match['id']] = match
+                added.append(match)
+            self._count_match(match, 1)
+            self.notes_index.add(match)
+            stale.add(match['deck'])
+            deck_dates[match['deck']] = max(deck_dates.get(match['deck']) or '', match['date'])
+            archetype_dates[match['opponent']] = max(archetype_dates.get(match['opponent']) or '', match['date'])
+            self._stamp(match, entry['modified'], seq)
+            merged.append(match)
+        for deck in stale:
+            self.matchup_cache.invalidate(deck)
+        if not merged and not deleted:
+            return True, "Already up to date"
+        
+        if added:
+            self._index_times(added)
+            if self.columns is not None:
+                self.columns.extend(added)
+        self._update_collections(deck_dates, archetype_dates)
+        self._log_op('merge', matches=[dict(match) for match in merged], deleted=deleted)
+        removed = sum(1 for _, match_id, _ in deleted if match_id is not None)
+        return True, f"{len(added)} matches added, {len(merged) - len(added)} updated, {removed} deleted"
+    
+    def _log_op(self, op, **fields):
+        """Hand a record describing one mutation to the storage backend"""
+        self._journal_seq += 1
+        self.version += 1
+        fields['op'] = op
+        fields['seq'] = self._journal_seq
+        self.storage.record(fields)
+    
+    def _snapshot_data(self):
+        """Copy the current state into a snapshot document"""
+        return {
+            'matches': [dict(match) for match in self._matches.values()],
+            'decks': list(self.decks),
+            'archetypes': list(self.archetypes),
+            'next_id': self._next_id,
+            'journal_seq': self._journal_seq,
+            'tombstones': [[t['uid'], t['seq'], t['modified']] for t in self._tombstones.values()]
+        }
+    
+    def _restore(self, data):
+        """Replace the current state with a loaded snapshot document"""
+        self._next_id = data.get('next_id', 0)
+        if 'timeline' in data:
+            # Binary snapshots always carry ids, so there is nothing to assign
+            self._matches = {match['id']: match for match in data['matches']}
+        else:
+            self.matches = data['matches']
+        self.decks = set(data['decks'])
+        self.archetypes = set(data['archetypes'])
+        self._journal_seq = data.get('journal_seq', 0)
+        self._tombstones = {uid: {'uid': uid, 'seq': seq, 'modified': modified, 'deleted': True}
+                            for uid, seq, modified in data.get('tombstones', ())}
+        self._ensure_sync_fields()
+        self._rebuild_indexes(data.get('timeline'), data.get('notes_index'))
+    
+    def _replay(self, records):
+        """Apply journal records newer than the loaded snapshot.
+        
+        Each record goes through the same incremental updates as the live
+        operations, so the snapshot's timeline and notes index stay in use.
+        """
+        replayed = False
+        for record in records:
+            if record['seq'] <= self._journal_seq:
+                continue
+            self._apply_op(record)
+            self._journal_seq = record['seq']
+            replayed = True
+        if replayed:
+            self.version += 1
+            self._update_collections()
+    
+    def _ensure_sync_fields(self):
+        """Give matches recorded before change tracking a uid and sequence number 0"""
+        for match in self._matches.values():
+            if 'uid' not in match:
+                match['uid'] = legacy_uid(match)
+                # Journaled edits replayed onto it may already have stamped it
+                match.setdefault('seq', 0)
+                match.setdefault('modified', 0)
+    
+    def _replay_add(self, match):
+        """Add a journaled match to the history and every index"""
+        if 'uid' not in match:
+            match['uid'] = legacy_uid(match)
+            match.setdefault('seq', 0)
+            match.setdefault('modified', 0)
+        self._matches[match['id']] = match
+        self._next_id = max(self._next_id, match['id'] + 1)
+        self._count_match(match, 1)
+        self._index_time(match)
+        self.notes_index.add(match)
+        if self.columns is not None:
+            self.columns.append(match)
+    
+    def _apply_op(self, record):
+        op = record['op']
+        # Records from before change tracking carry no modification time
+        modified = record.get('modified', 0)
+        if op == 'add':
+            self._replay_add(record['match'])
+        elif op == 'add_batch':
+            for match in record['matches']:
+                self._replay_add(match)
+        elif op == 'edit':
+            match = self._matches.get(record['id'])
+            if match:
+                self._count_match(match, -1)
+                self.notes_index.remove(match)
+                for field in ('deck', 'opponent', 'result', 'notes'):
+                    match[field] = record[field]
+                self._count_match(match, 1)
+                self.notes_index.add(match)
+                self._stamp(match, modified, record['seq'])
+                if self.columns is not None:
+                    self.columns.update(match)
+        elif op == 'delete':
+            match = self._matches.get(record['id'])
+            if match:
+                self._drop_match(match)
+                self._bury(match.get('uid') or legacy_uid(match), record['seq'], modified)
+        elif op == 'rename_deck':
+            for match in self._matches.values():
+                if match['deck'] == record['old']:
+                    self._count_match(match, -1)
+                    match['deck'] = record['new']
+                    self._count_match(match, 1)
+                    self._stamp(match, modified, record['seq'])
+            if self.columns is not None:
+                self.columns.rename_deck(record['old'], record['new'])
+        elif op == 'delete_deck':
+            for match in [m for m in self._matches.values() if m['deck'] == record['deck']]:
+                self._drop_match(match)
+                self._bury(match.get('uid') or legacy_uid(match), record['seq'], modified)
+        elif op == 'batch':
+            touched, _, _, deltas, old_notes = self._batch_pass(self._matches.values(), record['decks'],
+                                                                record['archetypes'], record['changes'],
+                                                                set(record['ids']))
+            for match in touched:
+                self._stamp(match, modified, record['seq'])
+                if self.columns is not None:
+                    self.columns.update(match)
+            for match_id, notes in old_notes.items():
+                self.notes_index.remove({'id': match_id, 'notes': notes})
+                self.notes_index.add(self._matches[match_id])
+            for (deck, opponent, result), delta in deltas.items():
+                if delta:
+                    self._count_result(deck, opponent, result, delta)
+        elif op == 'merge':
+            for match in record['matches']:
+                self._tombstones.pop(match['uid'], None)
+                local = self._matches.get(match['id'])
+                if local is None:
+                    self._replay_add(dict(match))
+                    continue
+                self._count_match(local, -1)
+                self._unindex_time(local)
+                self.notes_index.remove(local)
+                local.update(match)
+                self._count_match(local, 1)
+                self._index_time(local)
+                self.notes_index.add(local)
+                if self.columns is not None:
+                    self.columns.update(local)
+            for uid, match_id, deleted_at in record['deleted']:
+                match = self._matches.get(match_id)
+                if match is not None:
+                    self._drop_match(match)
+                self._bury(uid, record['seq'], deleted_at)
+    
+    @_instrumented
     def save_to_file(self, filename):
-        self._ensure_match_ids()
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump({
-                'matches': self.matches,
-                'decks': list(self.decks),
-                'archetypes': list(self.archetypes)
-            }, f, ensure_ascii=False, indent=2)
+        self.storage.save(self, filename)
+    
+    def export_json(self, filename):
+        """Write the whole history as a pretty-printed JSON document, whatever the storage backend"""
+        with self.lock:
+            data = self._snapshot_data()
+        JsonStorage()._write_snapshot(filename, data)
+    
+    @_instrumented
+    @_synchronized
+    def load_from_file(self, filename, progress=None):
+        """Load the history; progress(done, total) is called as the snapshot is read"""
+        return self.storage.load(self, filename, progress)
+    
+    def close(self):
+        """Release the storage backend, waiting for any background work"""
+        self.storage.close()
+
+class ColumnarMatchStore:
+    """Column-per-field, dictionary-encoded copy of the match history.
+    
+    Deck and opponent names are interned to integer codes, results are kept
+    as int8 (0 win, 1 draw, 2 loss, -1 for a deleted row) and dates as int64
+    epoch seconds, so stats over millions of matches are a single bincount.
+    The tracker keeps it next to the match dicts, not instead of them, so it
+    buys faster date-range queries with extra memory.
+    """
+    RESULT_CODES = {'win': 0, 'draw': 1, 'loss': 2}
+    DELETED = -1
+    
+    def __init__(self, capacity=1024):
+        self._np = _numpy()
+        self.deck_names = []
+        self.opponent_names = []
+        self._deck_codes = {}
+        self._opponent_codes = {}
+        self.size = 0
+        self.ids = self._np.empty(capacity, dtype=self._np.int64)
+        self.deck = self._np.empty(capacity, dtype=self._np.int32)
+        self.opponent = self._np.empty(capacity, dtype=self._np.int32)
+        self.result = self._np.empty(capacity, dtype=self._np.int8)
+        self.timestamp = self._np.empty(capacity, dtype=self._np.int64)
+        # Rows are appended in id order, so ids can be binary searched until
+        # an out-of-order id forces a dict
+        self._row_index = None
+    
+    @classmethod
+    def from_matches(cls, matches, chunk_size=65536):
+        store = cls()
+        chunk = []
+        for match in matches:
+            chunk.append(match)
+            if len(chunk) >= chunk_size:
+                store.extend(chunk)
+                chunk = []
+        store.extend(chunk)
+        return store
     
-    def load_from_file(self, filename):
+    @property
+    def nbytes(self):
+        return sum(column[:self.size].nbytes for column in
+                   (self.ids, self.deck, self.opponent, self.result, self.timestamp))
+    
+    def _intern(self, names, codes, name):
+        code = codes.get(name)
+        if code is None:
+            code = codes[name] = len(names)
+            names.append(name)
+        return code
+    
+    def _reserve(self, count):
+        needed = self.size + count
+        capacity = len(self.ids)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ('ids', 'deck', 'opponent', 'result', 'timestamp'):
+            column = getattr(self, name)
+            grown = self._np.empty(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            setattr(self, name, grown)
+    
+    def extend(self, matches):
+        """Append a batch of match dicts"""
+        if not matches:
+            return
+        np = self._np
+        count = len(matches)
+        self._reserve(count)
+        start, end = self.size, self.size + count
+        self.ids[start:end] = [match['id'] for match in matches]
+        self.deck[start:end] = [self._intern(self.deck_names, self._deck_codes, match['deck']) for match in matches]
+        self.opponent[start:end] = [self._intern(self.opponent_names, self._opponent_codes, match['opponent'])
+                                    for match in matches]
+        self.result[start:end] = [self.RESULT_CODES.get(match['result'], 1) for match in matches]
+        self.timestamp[start:end] = [parse_date(match['date']) for match in matches]
+        if self._row_index is not None:
+            for row in range(start, end):
+                self._row_index[int(self.ids[row])] = row
+        elif (start and self.ids[start] <= self.ids[start - 1]) or np.any(np.diff(self.ids[start:end]) <= 0):
+            self._row_index = {int(match_id): row for row, match_id in enumerate(self.ids[:end])}
+        self.size = end
+    
+    def append(self, match):
+        self.extend([match])
+    
+    def _row(self, match_id):
+        if self._row_index is not None:
+            return self._row_index.get(match_id)
+        row = int(self._np.searchsorted(self.ids[:self.size], match_id))
+        if row < self.size and self.ids[row] == match_id:
+            return row
+        return None
+    
+    def update(self, match):
+        row = self._row(match['id'])
+        if row is None:
+            return
+        self.deck[row] = self._intern(self.deck_names, self._deck_codes, match['deck'])
+        self.opponent[row] = self._intern(self.opponent_names, self._opponent_codes, match['opponent'])
+        self.result[row] = self.RESULT_CODES.get(match['result'], 1)
+        self.timestamp[row] = parse_date(match['date'])
+    
+    def remove(self, match_id):
+        row = self._row(match_id)
+        if row is not None:
+            self.result[row] = self.DELETED
+    
+    def rename_deck(self, old_name, new_name):
+        """Relabel a deck code; no rows are touched"""
+        code = self._deck_codes.pop(old_name, None)
+        if code is None:
+            return
+        if new_name in self._deck_codes:
+            # Merging into an existing deck has to rewrite the rows
+            target = self._deck_codes[new_name]
+            self.deck[:self.size][self.deck[:self.size] == code] = target
+            self.deck_names[code] = None
+            return
+        self.deck_names[code] = new_name
+        self._deck_codes[new_name] = code
+    
+    def delete_deck(self, deck_name):
+        code = self._deck_codes.get(deck_name)
+        if code is not None:
+            self.result[:self.size][self.deck[:self.size] == code] = self.DELETED
+    
+    def matchup_matrix(self, decks=None, since=None, until=None):
+        """Deck x opponent x (wins, draws, losses) counts in one vectorized pass.
+        
+        decks is a deck name or a collection of them; since and until are epoch
+        seconds bounding the dates (since <= date < until).
+        """
+        np = self._np
+        deck_count = len(self.deck_names)
+        opponent_count = len(self.opponent_names)
+        result = self.result[:self.size]
+        live = result >= 0
+        if isinstance(decks, str):
+            live &= self.deck[:self.size] == self._deck_codes.get(decks, -1)
+        elif decks is not None:
+            live &= np.isin(self.deck[:self.size], [self._deck_codes[deck] for deck in decks if deck in self._deck_codes])
+        if since is not None:
+            live &= self.timestamp[:self.size] >= since
+        if until is not None:
+            live &= self.timestamp[:self.size] < until
+        cells = (self.deck[:self.size][live].astype(np.int64) * opponent_count
+                 + self.opponent[:self.size][live]) * 3 + result[live]
+        counts = np.bincount(cells, minlength=deck_count * opponent_count * 3)
+        return counts.reshape(deck_count, opponent_count, 3)
+    
+    def deck_stats(self, decks=None, since=None, until=None):
+        """Same shape as PokemonDeckTracker.get_deck_stats"""
+        np = self._np
+        counts = self.matchup_matrix(decks, since, until)
+        cells = np.argwhere(counts.sum(axis=2)).tolist()
+        counts = counts.tolist()
+        stats = _new_deck_stats()
+        for deck_code, opponent_code in cells:
+            wins, draws, losses = counts[deck_code][opponent_code]
+            deck = stats[self.deck_names[deck_code]]
+            deck['wins'] += wins
+            deck['draws'] += draws
+            deck['losses'] += losses
+            deck['matchups'][self.opponent_names[opponent_code]] = {'wins': wins, 'losses': losses, 'draws': draws}
+        return stats
+
+def tokenize(text):
+    """Distinct casefolded words of a note"""
+    return set(TOKEN_PATTERN.findall(text.casefold()))
+
+class NotesIndex:
+    """Inverted index from the words of match notes to match ids.
+    
+    A query is a list of words that must all appear (AND); a word ending in *
+    matches every indexed word with that prefix, found by bisecting the sorted
+    vocabulary. Queries never look at the note strings themselves.
+    """
+    def __init__(self, postings=None):
+        # word -> set of match ids
+        self.postings = postings if postings is not None else {}
+        self.terms = sorted(self.postings)
+    
+    @classmethod
+    def from_matches(cls, matches):
+        postings = defaultdict(set)
+        for match in matches:
+            if match.get('notes'):
+                for term in tokenize(match['notes']):
+                    postings[term].add(match['id'])
+        return cls(dict(postings))
+    
+    def add(self, match):
+        if not match.get('notes'):
+            return
+        for term in tokenize(match['notes']):
+            ids = self.postings.get(term)
+            if ids is None:
+                ids = self.postings[term] = set()
+                insort(self.terms, term)
+            ids.add(match['id'])
+    
+    def remove(self, match):
+        if not match.get('notes'):
+            return
+        for term in tokenize(match['notes']):
+            ids = self.postings.get(term)
+            if ids is None:
+                continue
+            ids.discard(match['id'])
+            if not ids:
+                del self.postings[term]
+                del self.terms[bisect_left(self.terms, term)]
+    
+    def _prefix_ids(self, prefix):
+        matching = []
+        for position in range(bisect_left(self.terms, prefix), len(self.terms)):
+            if not self.terms[position].startswith(prefix):
+                break
+            matching.append(self.postings[self.terms[position]])
+        return set().union(*matching)
+    
+    def search(self, query):
+        """Ids of the matches whose notes contain every term of the query"""
+        candidates = [self._prefix_ids(word) if prefix else self.postings.get(word, set())
+                      for word, prefix in QUERY_PATTERN.findall(query.casefold())]
+        if not candidates:
+            return set()
+        candidates.sort(key=len)
+        ids = set(candidates[0])
+        for other in candidates[1:]:
+            ids &= other
+            if not ids:
+                break
+        return ids
+    
+    def dump(self, filename, journal_seq):
+        """Persist the index for the snapshot with the given journal_seq"""
+        tmp_filename = filename + '.tmp'
+        with open(tmp_filename, 'w', encoding='utf-8') as f:
+            json.dump({'journal_seq': journal_seq,
+                       'postings': {term: sorted(ids) for term, ids in self.postings.items()}},
+                      f, ensure_ascii=False, separators=(',', ':'))
+            metrics.record_bytes('notes index', f.tell())
+        os.replace(tmp_filename, filename)
+    
+    @classmethod
+    def load(cls, filename, journal_seq):
+        """The persisted index, or None if it is missing or belongs to another snapshot"""
         try:
             with open(filename, 'r', encoding='utf-8') as f:
                 data = json.load(f)
-                self.matches = data['matches']
-                self.decks = set(data['decks'])
-                self.archetypes = set(data['archetypes'])
-                self._ensure_match_ids()
-            return True
+        except (OSError, ValueError):
+            return None
+        if data.get('journal_seq') != journal_seq:
+            return None
+        return cls({term: set(ids) for term, ids in data['postings'].items()})
+
+class NameIndex:
+    """Case-insensitive prefix trie of deck or archetype names for autocomplete.
+    
+    Names are ranked by match count and by the date they were last used.
+    Every node keeps the names below it in rank order, so a lookup walks the
+    prefix and slices a list, and a change re-ranks one name along its own path.
+    """
+    def __init__(self):
+        # node = (children by character, [(rank, name)] sorted best first)
+        self._root = ({}, [])
+        # name -> (match count, date last used)
+        self.uses = {}
+        self._ranks = {}
+    
+    @classmethod
+    def from_uses(cls, uses):
+        index = cls()
+        for name, (count, last) in uses.items():
+            index.update(name, count, last)
+        return index
+    
+    @staticmethod
+    def _rank(name, count, last):
+        recency = parse_date(last) / NAME_RECENCY_HALF_LIFE if last else 0.0
+        return (-(log2(count) + recency), name)
+    
+    def update(self, name, count, date=None):
+        """Set a name's match count, folding in a date it was used; a count of 0 drops it"""
+        last = max(self.uses[name][1], date or '') if name in self.uses else date or ''
+        self._remove(name)
+        if count <= 0:
+            return
+        rank = self._ranks[name] = self._rank(name, count, last)
+        self.uses[name] = (count, last)
+        node = self._root
+        insort(node[1], rank)
+        for char in name.casefold():
+            child = node[0].get(char)
+            if child is None:
+                child = node[0][char] = ({}, [])
+            insort(child[1], rank)
+            node = child
+    
+    def rename(self, old, new, count):
+        """Move old's use history to new, which now has count matches"""
+        last = self.uses.get(old, (0, ''))[1]
+        self._remove(old)
+        self.update(new, count, last)
+    
+    def _remove(self, name):
+        rank = self._ranks.pop(name, None)
+        if rank is None:
+            return
+        del self.uses[name]
+        node = self._root
+        del node[1][bisect_left(node[1], rank)]
+        for char in name.casefold():
+            child = node[0][char]
+            del child[1][bisect_left(child[1], rank)]
+            if not child[1]:
+                # Nothing else lives below this node
+                del node[0][char]
+                break
+            node = child
+    
+    def suggest(self, prefix, limit=SUGGESTION_LIMIT):
+        """Up to limit names (all if None) starting with prefix, most used and most recent first"""
+        node = self._root
+        for char in prefix.casefold():
+            node = node[0].get(char)
+            if node is None:
+                return []
+        return [name for _, name in node[1][:limit]]
+
+class MatchupCache:
+    """LRU cache of per-deck matchup rows keyed by (deck filter, since, until).
+    
+    A mutation marks its deck stale in the entries whose filter and date range
+    cover the changed match; the next lookup recomputes just those rows.
+    """
+    def __init__(self, maxsize=MATCHUP_CACHE_SIZE):
+        self.maxsize = maxsize
+        # key -> {'rows': {deck: row}, 'stale': decks to recompute}
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry
+    
+    def store(self, key, rows):
+        entry = self._entries[key] = {'rows': rows, 'stale': set()}
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return entry
+    
+    def invalidate(self, deck, timestamp=None):
+        """Mark a deck's rows stale; with a timestamp, only in entries whose range contains it"""
+        for (deck_filter, since, until), entry in self._entries.items():
+            if deck_filter is not None and deck_filter != deck:
+                continue
+            if timestamp is not None and ((since is not None and timestamp < since) or
+                                          (until is not None and timestamp >= until)):
+                continue
+            entry['stale'].add(deck)
+    
+    def clear(self):
+        self._entries.clear()
+
+def _plain_stats(stats):
+    """Stats as plain nested dicts, for order-insensitive comparison"""
+    return {deck: {'wins': s['wins'], 'losses': s['losses'], 'draws': s['draws'],
+                   'matchups': {opponent: dict(results) for opponent, results in s['matchups'].items()}}
+            for deck, s in stats.items()}
+
+class _JsonStream:
+    """Incremental reader for one large JSON document.
+    
+    The file is decoded chunk by chunk and values are parsed one at a time with
+    json's own decoder, so only the current chunk is ever held as text.
+    """
+    def __init__(self, f, progress=None, object_pairs_hook=None, chunk_size=STREAM_CHUNK_SIZE):
+        self.f = f
+        self.progress = progress
+        self.chunk_size = chunk_size
+        self.total = os.fstat(f.fileno()).st_size
+        self.bytes_read = 0
+        self.eof = False
+        self.buffer = ''
+        self.pos = 0
+        self._decode = codecs.getincrementaldecoder('utf-8')().decode
+        self._decoder = json.JSONDecoder(object_pairs_hook=object_pairs_hook)
+    
+    def _fill(self):
+        """Append the next chunk to the unread part of the buffer; False at the end of the file"""
+        if self.eof:
+            return False
+        data = self.f.read(self.chunk_size)
+        self.bytes_read += len(data)
+        self.eof = not data
+        self.buffer = self.buffer[self.pos:] + self._decode(data, self.eof)
+        self.pos = 0
+        if self.progress:
+            self.progress(self.bytes_read, self.total)
+        return not self.eof
+    
+    def peek(self):
+        """Next non-whitespace character, or '' at the end of the document"""
+        while True:
+            self.pos = json.decoder.WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or not self._fill():
+                return self.buffer[self.pos:self.pos + 1]
+    
+    def take(self, char):
+        if self.peek() != char:
+            raise ValueError(f'Expected {char!r} at offset {self.bytes_read - len(self.buffer) + self.pos}')
+        self.pos += 1
+    
+    def value(self):
+        """Parse the next complete value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.pos)
+                # A number or literal ending exactly at the chunk edge may continue in the next one
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except ValueError:
+                if self.eof:
+                    raise
+            self._fill()
+    
+    def keys(self):
+        """Iterate over the keys of an object; the caller consumes each value"""
+        self.take('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.take(':')
+            yield key
+            if self.peek() != ',':
+                break
+            self.pos += 1
+        self.take('}')
+    
+    def elements(self):
+        """Iterate over the values of an array"""
+        self.take('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() != ',':
+                break
+            self.pos += 1
+        self.take(']')
+
+class JsonStorage:
+    """Pretty-printed JSON snapshot, optionally backed by an append-only journal"""
+    def __init__(self, journal=False, compact_threshold=JOURNAL_COMPACT_BYTES):
+        self.journal = journal
+        self.compact_threshold = compact_threshold
+        self._pending_ops = []
+        self._compaction = None
+        self._bulk = False
+    
+    def record(self, record):
+        if self.journal and not self._bulk:
+            self._pending_ops.append(record)
+    
+    def begin_bulk(self):
+        """Stop journaling until the next save, which writes a snapshot instead"""
+        self._bulk = True
+        self._pending_ops = []
+    
+    def _write_snapshot(self, filename, data):
+        """Write a snapshot to a temp file and atomically move it into place"""
+        tmp_filename = filename + '.tmp'
+        with open(tmp_filename, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            metrics.record_bytes('snapshot (json)', f.tell())
+        os.replace(tmp_filename, filename)
+    
+    def _journal_files(self, filename):
+        """Rotated journals awaiting compaction, oldest first, then the live one"""
+        rotated = glob.glob(glob.escape(filename + JOURNAL_SUFFIX) + '.*')
+        rotated = [path for path in rotated if path.rsplit('.', 1)[1].isdigit()]
+        rotated.sort(key=lambda path: int(path.rsplit('.', 1)[1]))
+        return rotated + [filename + JOURNAL_SUFFIX]
+    
+    def _read_journal(self, filename):
+        for path in self._journal_files(filename):
+            try:
+                f = open(path, 'r', encoding='utf-8')
+            except FileNotFoundError:
+                continue
+            with f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        # Torn write at the tail of the journal
+                        continue
+    
+    def wait_for_compaction(self):
+        """Block until a running background compaction has finished"""
+        if self._compaction is not None:
+            self._compaction.join()
+            self._compaction = None
+    
+    def compact(self, tracker, filename, background=True):
+        """Fold the journal into a fresh snapshot"""
+        self.wait_for_compaction()
+        with tracker.lock:
+            data = tracker._snapshot_data()
+            if not background:
+                self._pending_ops = []
+        seq = data['journal_seq']
+        journal = filename + JOURNAL_SUFFIX
+        if os.path.exists(journal):
+            os.replace(journal, f"{journal}.{seq}")
+        covered = [path for path in self._journal_files(filename)[:-1]
+                   if int(path.rsplit('.', 1)[1]) <= seq]
+        
+        def run():
+            self._write_snapshot(filename, data)
+            NotesIndex.from_matches(data['matches']).dump(filename + NOTES_SUFFIX, seq)
+            for path in covered:
+                os.remove(path)
+        
+        if background:
+            self._compaction = threading.Thread(target=run, daemon=True)
+            self._compaction.start()
+        else:
+            run()
+    
+    def save(self, tracker, filename):
+        if not self.journal or self._bulk or not os.path.exists(filename):
+            self.compact(tracker, filename, background=False)
+            self._bulk = False
+            return
+        with tracker.lock:
+            ops, self._pending_ops = self._pending_ops, []
+        if not ops:
+            return
+        try:
+            with open(filename + JOURNAL_SUFFIX, 'a', encoding='utf-8') as f:
+                journal_start = f.tell()
+                for record in ops:
+                    f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+                journal_size = f.tell()
+            metrics.record_bytes('journal', journal_size - journal_start)
+        except Exception:
+            with tracker.lock:
+                self._pending_ops[:0] = ops
+            raise
+        if journal_size >= self.compact_threshold:
+            self.compact(tracker, filename)
+    
+    def _read_snapshot(self, filename, progress=None):
+        """Stream a snapshot document one match at a time"""
+        strings = {}
+        
+        def share(pairs):
+            # One object per distinct key and deck/opponent/result/notes value instead of one per match
+            return {strings.setdefault(key, key): strings.setdefault(value, value) if key in SHARED_FIELDS else value
+                    for key, value in pairs}
+        
+        data = {}
+        with open(filename, 'rb') as f:
+            stream = _JsonStream(f, progress, share)
+            for key in stream.keys():
+                data[key] = list(stream.elements()) if key == 'matches' else stream.value()
+        return data
+    
+    def load(self, tracker, filename, progress=None):
+        try:
+            data = self._read_snapshot(filename, progress)
         except FileNotFoundError:
             return False
+        data['notes_index'] = NotesIndex.load(filename + NOTES_SUFFIX, data.get('journal_seq', 0))
+        tracker._restore(data)
+        self._pending_ops = []
+        tracker._replay(self._read_journal(filename))
+        return True
+    
+    def close(self):
+        self.wait_for_compaction()
+
+class BinaryStorage(JsonStorage):
+    """Compact binary snapshot with the same JSONL journal as JsonStorage.
+    
+    After a fixed header come every distinct string (their lengths, then all of
+    them as one UTF-8 block) and one little-endian column per match field: ids and timestamps as
+    int64, date/deck/opponent/result/notes as uint32 codes into the string table.
+    Matches are stored in (timestamp, id) order, so loading neither parses dates
+    nor sorts the timestamp index. Version 2 appends int64 uid/seq/modified
+    columns for the matches and then for the tombstones.
+    """
+    MAGIC = b'PDTS'
+    VERSION = 2
+    # magic, version, next_id, journal_seq, match count, string count, string bytes, deck count, archetype count
+    HEADER_V1 = struct.Struct('<4sHqqIIQII')
+    # ... and tombstone count
+    HEADER = struct.Struct('<4sHqqIIQIII')
+    FIELDS = ('date', 'deck', 'opponent', 'result', 'notes')
+    SYNC_FIELDS = ('uid', 'seq', 'modified')
+    
+    def __init__(self, compact_threshold=JOURNAL_COMPACT_BYTES):
+        super().__init__(journal=True, compact_threshold=compact_threshold)
+    
+    @staticmethod
+    def _column(typecode, values):
+        column = array(typecode, values)
+        if sys.byteorder != 'little':
+            column.byteswap()
+        return column
+    
+    def _write_snapshot(self, filename, data):
+        # Ids are unique, so the match dicts themselves are never compared
+        timeline = sorted((parse_date(match['date']), match['id'], match) for match in data['matches'])
+        matches = [match for _, _, match in timeline]
+        codes = {}
+        columns = [self._column('I', [codes.setdefault(match.get(field, ''), len(codes)) for match in matches])
+                   for field in self.FIELDS]
+        decks = self._column('I', [codes.setdefault(deck, len(codes)) for deck in data['decks']])
+        archetypes = self._column('I', [codes.setdefault(archetype, len(codes)) for archetype in data['archetypes']])
+        text = ''.join(codes).encode('utf-8')
+        
+        tmp_filename = filename + '.tmp'
+        with open(tmp_filename, 'wb') as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.VERSION, data['next_id'], data['journal_seq'],
+                                     len(matches), len(codes), len(text), len(decks), len(archetypes),
+                                     len(data['tombstones'])))
+            f.write(self._column('I', [len(string) for string in codes]).tobytes())
+            f.write(text)
+            f.write(self._column('q', [match['id'] for match in matches]).tobytes())
+            f.write(self._column('q', [timestamp for timestamp, _, _ in timeline]).tobytes())
+            for column in columns + [decks, archetypes]:
+                f.write(column.tobytes())
+            for field in self.SYNC_FIELDS:
+                f.write(self._column('q', [match[field] for match in matches]).tobytes())
+            for position in range(len(self.SYNC_FIELDS)):
+                f.write(self._column('q', [tombstone[position] for tombstone in data['tombstones']]).tobytes())
+            metrics.record_bytes('snapshot (binary)', f.tell())
+        os.replace(tmp_filename, filename)
+    
+    def _read_snapshot(self, filename, progress=None):
+        with open(filename, 'rb') as f:
+            buffer = f.read()
+        if progress:
+            progress(len(buffer), len(buffer))
+        if buffer[:4] != self.MAGIC:
+            raise ValueError(f'{filename} is not a binary deck tracker snapshot')
+        version = struct.unpack_from('<H', buffer, len(self.MAGIC))[0]
+        if version == 1:
+            header = self.HEADER_V1.unpack_from(buffer) + (0,)
+        elif version == self.VERSION:
+            header = self.HEADER.unpack_from(buffer)
+        else:
+            raise ValueError(f'Unsupported snapshot version {version}')
+        _, _, next_id, journal_seq, count, string_count, text_size, deck_count, archetype_count, tombstone_count = header
+        offset = (self.HEADER_V1 if version == 1 else self.HEADER).size
+        
+        def read(typecode, length):
+            nonlocal offset
+            column = array(typecode)
+            column.frombytes(buffer[offset:offset + length * column.itemsize])
+            offset += length * column.itemsize
+            if sys.byteorder != 'little':
+                column.byteswap()
+            return column
+        
+        # Lengths count characters, so the block is decoded once and then sliced
+        lengths = read('I', string_count)
+        text = buffer[offset:offset + text_size].decode('utf-8')
+        offset += text_size
+        ends = list(accumulate(lengths))
+        strings = [text[end - length:end] for end, length in zip(ends, lengths)]
+        
+        ids = read('q', count)
+        timeline = read('q', count)
+        dates, decks, opponents, results, notes = [read('I', count) for _ in self.FIELDS]
+        deck_names = [strings[code] for code in read('I', deck_count)]
+        archetype_names = [strings[code] for code in read('I', archetype_count)]
+        if version == 1:
+            # Matches get their legacy uids when the tracker restores them
+            matches = [{
+                'id': match_id,
+                'date': strings[date],
+                'deck': strings[deck],
+                'opponent': strings[opponent],
+                'result': strings[result],
+                'notes': strings[note]
+            } for match_id, date, deck, opponent, result, note in zip(ids, dates, decks, opponents, results, notes)]
+            tombstones = []
+        else:
+            uids, seqs, modified = [read('q', count) for _ in self.SYNC_FIELDS]
+            matches = [{
+                'id': match_id,
+                'date': strings[date],
+                'deck': strings[deck],
+                'opponent': strings[opponent],
+                'result': strings[result],
+                'notes': strings[note],
+                'uid': uid,
+                'seq': seq,
+                'modified': modified_at
+            } for match_id, date, deck, opponent, result, note, uid, seq, modified_at
+                in zip(ids, dates, decks, opponents, results, notes, uids, seqs, modified)]
+            tombstones = list(zip(*[read('q', tombstone_count) for _ in self.SYNC_FIELDS]))
+        return {
+            'matches': matches,
+            'decks': deck_names,
+            'archetypes': archetype_names,
+            'next_id': next_id,
+            'journal_seq': journal_seq,
+            'tombstones': tombstones,
+            'timeline': timeline
+        }
+
+class SqliteStorage:
+    """SQLite database with one row per match.
+    
+    Every mutation becomes a single statement that the next save applies and
+    commits in one transaction, so writes cost the size of the change. Like
+    the other backends it is a storage format: the history is loaded into
+    memory and stats come from the tracker's aggregates. The GROUP BY in
+    deck_stats only cross-checks them in verify mode, and the indexes serve
+    the deck and archetype renames, merges and deletes.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS matches (
+            id INTEGER PRIMARY KEY,
+            date TEXT NOT NULL,
+            deck TEXT NOT NULL,
+            opponent TEXT NOT NULL,
+            result TEXT NOT NULL,
+            notes TEXT NOT NULL DEFAULT '',
+            uid INTEGER,
+            seq INTEGER NOT NULL DEFAULT 0,
+            modified INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS matches_deck ON matches (deck, opponent, result);
+        CREATE INDEX IF NOT EXISTS matches_opponent ON matches (opponent);
+        -- No query filters on the date; earlier versions indexed it
+        DROP INDEX IF EXISTS matches_date;
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+        CREATE TABLE IF NOT EXISTS notes_terms (
+            term TEXT NOT NULL,
+            id INTEGER NOT NULL,
+            PRIMARY KEY (term, id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS notes_terms_id ON notes_terms (id);
+        CREATE TABLE IF NOT EXISTS tombstones (
+            uid INTEGER PRIMARY KEY,
+            seq INTEGER NOT NULL,
+            modified INTEGER NOT NULL
+        );
+    """
+    COLUMNS = ('id', 'date', 'deck', 'opponent', 'result', 'notes', 'uid', 'seq', 'modified')
+    # Added to the matches table after its first release
+    SYNC_COLUMNS = {'uid': 'INTEGER', 'seq': 'INTEGER NOT NULL DEFAULT 0', 'modified': 'INTEGER NOT NULL DEFAULT 0'}
+    INSERT = f"INSERT OR REPLACE INTO matches ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+    
+    def __init__(self):
+        self._conn = None
+        self._filename = None
+        self._pending_ops = []
+        self._db_lock = threading.Lock()
+        self._bulk = False
+    
+    def _connect(self, filename):
+        if self._filename == filename:
+            return
+        self.close()
+        self._conn = sqlite3.connect(filename, check_same_thread=False)
+        self._conn.executescript(self.SCHEMA)
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(matches)")}
+        with self._conn:
+            for column, definition in self.SYNC_COLUMNS.items():
+                if column not in existing:
+                    self._conn.execute(f"ALTER TABLE matches ADD COLUMN {column} {definition}")
+        self._filename = filename
+    
+    def record(self, record):
+        if self._conn is None:
+            # Not attached to a database yet, the next save writes everything
+            return
+        self._pending_ops.append(record)
+        if self._bulk:
+            ops, self._pending_ops = self._pending_ops, []
+            try:
+                with self._db_lock, self._conn:
+                    for op in ops:
+                        self._apply(op)
+            except Exception:
+                self._pending_ops[:0] = ops
+                raise
+    
+    def begin_bulk(self):
+        """Write records to the database as they arrive instead of queueing them for the next save"""
+        self._bulk = True
+    
+    def _index_notes(self, matches):
+        self._conn.executemany("INSERT OR IGNORE INTO notes_terms (term, id) VALUES (?, ?)",
+                               ((term, match['id']) for match in matches for term in tokenize(match['notes'])))
+    
+    def _apply(self, record):
+        op = record['op']
+        if op == 'add':
+            match = record['match']
+            self._conn.execute(self.INSERT, [match[column] for column in self.COLUMNS])
+            self._index_notes([match])
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('next_id', ?)", (match['id'] + 1,))
+        elif op == 'add_batch':
+            self._conn.executemany(self.INSERT, ([match[column] for column in self.COLUMNS]
+                                                 for match in record['matches']))
+            self._index_notes(record['matches'])
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('next_id', ?)",
+                               (record['matches'][-1]['id'] + 1,))
+        elif op == 'edit':
+            self._conn.execute(
+                "UPDATE matches SET deck = ?, opponent = ?, result = ?, notes = ?, seq = ?, modified = ? WHERE id = ?",
+                (record['deck'], record['opponent'], record['result'], record['notes'], record['seq'],
+                 record['modified'], record['id']))
+            self._conn.execute("DELETE FROM notes_terms WHERE id = ?", (record['id'],))
+            self._index_notes([record])
+        elif op == 'delete':
+            self._conn.execute("INSERT OR REPLACE INTO tombstones (uid, seq, modified) "
+                               "SELECT uid, ?, ? FROM matches WHERE id = ?", (record['seq'], record['modified'], record['id']))
+            self._conn.execute("DELETE FROM matches WHERE id = ?", (record['id'],))
+            self._conn.execute("DELETE FROM notes_terms WHERE id = ?", (record['id'],))
+        elif op == 'rename_deck':
+            self._conn.execute("UPDATE matches SET deck = ?, seq = ?, modified = ? WHERE deck = ?",
+                               (record['new'], record['seq'], record['modified'], record['old']))
+        elif op == 'delete_deck':
+            self._conn.execute("INSERT OR REPLACE INTO tombstones (uid, seq, modified) "
+                               "SELECT uid, ?, ? FROM matches WHERE deck = ?",
+                               (record['seq'], record['modified'], record['deck']))
+            self._conn.execute("DELETE FROM notes_terms WHERE id IN (SELECT id FROM matches WHERE deck = ?)",
+                               (record['deck'],))
+            self._conn.execute("DELETE FROM matches WHERE deck = ?", (record['deck'],))
+        elif op == 'batch':
+            # One CASE per column, so swapped names (A -> B, B -> A) don't collide
+            for column, names in (('deck', record['decks']), ('opponent', record['archetypes'])):
+                if names:
+                    self._conn.execute(
+                        f"UPDATE matches SET {column} = CASE {column} {' '.join(['WHEN ? THEN ?'] * len(names))} END, "
+                        f"seq = ?, modified = ? WHERE {column} IN ({', '.join(['?'] * len(names))})",
+                        [name for pair in names.items() for name in pair] + [record['seq'], record['modified']]
+                        + list(names))
+            changes = dict(record['changes'], seq=record['seq'], modified=record['modified'])
+            if record['ids']:
+                fields = [field for field in self.COLUMNS if field in changes]
+                self._conn.executemany(
+                    f"UPDATE matches SET {', '.join(field + ' = ?' for field in fields)} WHERE id = ?",
+                    ([changes[field] for field in fields] + [match_id] for match_id in record['ids']))
+                if 'notes' in changes:
+                    self._conn.executemany("DELETE FROM notes_terms WHERE id = ?", ((i,) for i in record['ids']))
+                    self._index_notes({'id': i, 'notes': changes['notes']} for i in record['ids'])
+        elif op == 'merge':
+            self._conn.executemany(self.INSERT, ([match[column] for column in self.COLUMNS]
+                                                 for match in record['matches']))
+            self._conn.executemany("DELETE FROM notes_terms WHERE id = ?", ((match['id'],) for match in record['matches']))
+            self._index_notes(record['matches'])
+            self._conn.executemany("DELETE FROM tombstones WHERE uid = ?", ((match['uid'],) for match in record['matches']))
+            for uid, match_id, deleted_at in record['deleted']:
+                if match_id is not None:
+                    self._conn.execute("DELETE FROM matches WHERE id = ?", (match_id,))
+                    self._conn.execute("DELETE FROM notes_terms WHERE id = ?", (match_id,))
+                self._conn.execute("INSERT OR REPLACE INTO tombstones (uid, seq, modified) VALUES (?, ?, ?)",
+                                   (uid, record['seq'], deleted_at))
+            if record['matches']:
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('next_id', MAX(?, "
+                                   "COALESCE((SELECT value FROM meta WHERE key = 'next_id'), 0)))",
+                                   (max(match['id'] for match in record['matches']) + 1,))
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('journal_seq', ?)", (record['seq'],))
+    
+    def deck_stats(self, deck_name=None):
+        """Per-deck and per-matchup results from a GROUP BY over the matches table, for verify mode"""
+        if self._conn is None:
+            return None
+        stats = _new_deck_stats()
+        query = "SELECT deck, opponent, result, COUNT(*) FROM matches"
+        params = ()
+        if deck_name:
+            query += " WHERE deck = ?"
+            params = (deck_name,)
+        query += " GROUP BY deck, opponent, result"
+        with self._db_lock:
+            # Callers hold the tracker lock, so nothing is recorded meanwhile
+            ops, self._pending_ops = self._pending_ops, []
+            with self._conn:
+                for record in ops:
+                    self._apply(record)
+            for deck, opponent, result, count in self._conn.execute(query, params):
+                key = RESULT_KEYS.get(result, 'draws')
+                stats[deck][key] += count
+                stats[deck]['matchups'][opponent][key] += count
+        return stats
+    
+    def save(self, tracker, filename):
+        self._bulk = False
+        with tracker.lock:
+            if self._filename != filename:
+                data = tracker._snapshot_data()
+                ops = None
+            else:
+                ops, self._pending_ops = self._pending_ops, []
+        with self._db_lock:
+            if ops is None:
+                self._connect(filename)
+                with self._conn:
+                    self._conn.execute("DELETE FROM matches")
+                    self._conn.execute("DELETE FROM notes_terms")
+                    self._conn.execute("DELETE FROM tombstones")
+                    self._conn.executemany(self.INSERT, ([match[column] for column in self.COLUMNS]
+                                                         for match in data['matches']))
+                    self._conn.executemany("INSERT INTO tombstones (uid, seq, modified) VALUES (?, ?, ?)",
+                                           data['tombstones'])
+                    self._index_notes(data['matches'])
+                    self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('notes_index', 1)")
+                    self._conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                           [('journal_seq', data['journal_seq']), ('next_id', data['next_id'])])
+                return
+            try:
+                with self._conn:
+                    for record in ops:
+                        self._apply(record)
+            except Exception:
+                with tracker.lock:
+                    self._pending_ops[:0] = ops
+                raise
+    
+    def load(self, tracker, filename, progress=None):
+        if not os.path.exists(filename):
+            return False
+        with self._db_lock:
+            self._connect(filename)
+            self._pending_ops = []
+            total = self._conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0] if progress else 0
+            cursor = self._conn.execute(f"SELECT {', '.join(self.COLUMNS)} FROM matches ORDER BY id")
+            matches = []
+            while True:
+                rows = cursor.fetchmany(10000)
+                if not rows:
+                    break
+                matches.extend(dict(zip(self.COLUMNS, row)) for row in rows)
+                if progress:
+                    progress(len(matches), total)
+            meta = dict(self._conn.execute("SELECT key, value FROM meta"))
+            decks = [row[0] for row in self._conn.execute("SELECT DISTINCT deck FROM matches")]
+            archetypes = [row[0] for row in self._conn.execute("SELECT DISTINCT opponent FROM matches")]
+            if meta.get('notes_index'):
+                postings = defaultdict(set)
+                for term, match_id in self._conn.execute("SELECT term, id FROM notes_terms"):
+                    postings[term].add(match_id)
+                notes_index = NotesIndex(dict(postings))
+            else:
+                # Database from before the notes index: fill the table once
+                notes_index = NotesIndex.from_matches(matches)
+                with self._conn:
+                    self._conn.execute("DELETE FROM notes_terms")
+                    self._index_notes(matches)
+                    self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('notes_index', 1)")
+            legacy = [match for match in matches if match['uid'] is None]
+            if legacy:
+                # Rows from before change tracking: store their uids once
+                for match in legacy:
+                    match['uid'] = legacy_uid(match)
+                with self._conn:
+                    self._conn.executemany("UPDATE matches SET uid = ? WHERE id = ?",
+                                           ((match['uid'], match['id']) for match in legacy))
+            tombstones = self._conn.execute("SELECT uid, seq, modified FROM tombstones").fetchall()
+        tracker._restore({
+            'matches': matches,
+            'decks': decks,
+            'archetypes': archetypes,
+            'next_id': meta.get('next_id', 0),
+            'journal_seq': meta.get('journal_seq', 0),
+            'tombstones': tombstones,
+            'notes_index': notes_index
+        })
+        return True
+    
+    def close(self):
+        if self._conn is not None:
+            with self._conn:
+                for record in self._pending_ops:
+                    self._apply(record)
+            self._conn.close()
+        self._conn = None
+        self._filename = None
+        self._pending_ops = []
+
+def migrate_json(json_filename, filename, storage, progress=None):
+    """One-time copy of a pokemon_stats.json history (and its journal) into another backend"""
+    tracker = PokemonDeckTracker(JsonStorage(journal=True))
+    if not tracker.load_from_file(json_filename, progress):
+        return False
+    tracker.storage = storage
+    tracker.save_to_file(filename)
+    tracker.close()
+    return True
+
+def open_tracker(data_dir='data', backend=None, progress=None, columnar=None):
+    """Create a tracker on the configured storage backend and return it with its data file.
+    
+    progress is passed on to the load of a pokemon_stats.json that has to be migrated first.
+    columnar (default: $DECK_TRACKER_COLUMNAR=1) keeps the NumPy column store for date-range stats.
+    """
+    backend = backend or os.environ.get('DECK_TRACKER_STORAGE', 'binary')
+    if columnar is None:
+        columnar = os.environ.get('DECK_TRACKER_COLUMNAR') == '1'
+    json_filename = os.path.join(data_dir, 'pokemon_stats.json')
+    if backend == 'json':
+        return PokemonDeckTracker(JsonStorage(journal=True), columnar=columnar), json_filename
+    if backend == 'sqlite':
+        filename = os.path.join(data_dir, 'pokemon_stats.db')
+        storage = SqliteStorage
+    else:
+        filename = os.path.join(data_dir, 'pokemon_stats.pdt')
+        storage = BinaryStorage
+    if not os.path.exists(filename) and os.path.exists(json_filename):
+        migrate_json(json_filename, filename, storage(), progress)
+    return PokemonDeckTracker(storage(), columnar=columnar), filename
+
+class BackgroundSaver:
+    """Persist a tracker from a writer thread, coalescing bursts of changes.
+    
+    The GUI calls mark_dirty() after each mutation; the writer waits until no
+    change has arrived for `delay` seconds and then saves once. on_state is
+    called from the writer thread with a short status string.
+    """
+    def __init__(self, tracker, filename, delay=SAVE_DEBOUNCE_SECONDS, on_state=None):
+        self.tracker = tracker
+        self.filename = filename
+        self.delay = delay
+        self.on_state = on_state
+        self.last_saved = None
+        self.error = None
+        self._cond = threading.Condition()
+        self._dirty = False
+        self._saving = False
+        self._urgent = False
+        self._closing = False
+        self._changed_at = 0.0
+        self._attempts = 0
+        self._backoff = 0.0
+        self._retry_at = 0.0
+        self._thread = threading.Thread(target=self._run, name='tracker-writer', daemon=True)
+        self._thread.start()
+    
+    @property
+    def pending(self):
+        with self._cond:
+            return self._dirty or self._saving
+    
+    def state(self):
+        if self.error is not None:
+            return f'Save failed, retrying: {self.error}'
+        if self.pending:
+            return 'Saving...'
+        if self.last_saved is not None:
+            return f'All changes saved at {self.last_saved:%H:%M:%S}'
+        return ''
+    
+    def mark_dirty(self):
+        with self._cond:
+            self._dirty = True
+            self._changed_at = time.monotonic()
+            self._cond.notify_all()
+    
+    def flush(self):
+        """Save outstanding changes now and wait for the write; returns True if nothing is left unsaved"""
+        with self._cond:
+            self._urgent = True
+            self._cond.notify_all()
+            # A save already running may have missed the latest changes, so wait for the next one too
+            target = self._attempts + (2 if self._saving else 1)
+            while (self._dirty or self._saving) and self._attempts < target:
+                self._cond.wait()
+            self._urgent = False
+            return not (self._dirty or self._saving)
+    
+    def close(self, attempts=SAVE_CLOSE_ATTEMPTS):
+        """Save outstanding changes, retrying failed writes, and stop the writer.
+        
+        Returns (success, message); on failure the unsaved changes are lost
+        once the tracker is closed.
+        """
+        for attempt in range(attempts):
+            if self.flush():
+                break
+            if attempt + 1 < attempts:
+                time.sleep(SAVE_RETRY_SECONDS * 2 ** attempt)
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join()
+        if self._dirty:
+            return False, f'Your latest changes could not be saved: {self.error}'
+        return True, "All changes saved"
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._dirty and not self._closing:
+                    self._cond.wait()
+                if self._closing:
+                    return
+                while not (self._urgent or self._closing):
+                    remaining = max(self._changed_at + self.delay, self._retry_at) - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._closing:
+                    return
+                self._dirty = False
+                self._saving = True
+            
+            try:
+                self.tracker.save_to_file(self.filename)
+                with self._cond:
+                    self.error = None
+                    self.last_saved = datetime.now()
+                    self._backoff = 0.0
+            except Exception as e:
+                # The storage kept the unsaved records; write them again after a pause
+                with self._cond:
+                    self.error = e
+                    self._dirty = True
+                    self._backoff = min(self._backoff * 2 or SAVE_RETRY_SECONDS, SAVE_RETRY_MAX_SECONDS)
+                    self._retry_at = time.monotonic() + self._backoff
+            finally:
+                with self._cond:
+                    self._saving = False
+                    self._attempts += 1
+                    self._cond.notify_all()
+            if self.on_state is not None:
+                self.on_state(self.state())
+
+class StatsServer:
+    """Read-only HTTP API over a live tracker, served by aiohttp from its own thread.
+    
+    GET /stats, /matchups and /matches/recent return JSON. Each body comes
+    from one consistent state: cheap answers are read under the tracker lock,
+    while date ranges and notes searches copy the results they cover under the
+    lock and are counted after releasing it, so the GUI is never held up for
+    long. Bodies are cached per URL until the tracker's version changes. The
+    version is also the ETag, so pollers that send If-None-Match get a
+    bodiless 304.
+    """
+    def __init__(self, tracker, host='127.0.0.1', port=API_PORT):
+        self.tracker = tracker
+        self.host = host
+        self.port = port
+        # path with query -> (tracker version, JSON body)
+        self._cache = {}
+        # Keeps ETags from an earlier run from matching this one
+        self._instance = os.urandom(4).hex()
+        self._loop = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._error = None
+    
+    def start(self):
+        """Start serving in a daemon thread; raises ImportError without aiohttp and OSError if the port is taken"""
+        # aiohttp is imported by the server thread; fail here, in the caller, when it is missing
+        if importlib.util.find_spec('aiohttp') is None:
+            raise ImportError('The stats API needs aiohttp (pip install aiohttp)')
+        self._thread = threading.Thread(target=self._run, name='stats-api', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+    
+    def stop(self):
+        if self._loop is not None and self._thread.is_alive():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+    
+    def _run(self):
+        import asyncio
+        from aiohttp import web
+        app = web.Application()
+        for path in ('/stats', '/matchups', '/matches/recent'):
+            app.router.add_get(path, self._handle)
+        runner = web.AppRunner(app, access_log=None)
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(runner.setup())
+            site = web.TCPSite(runner, self.host, self.port)
+            loop.run_until_complete(site.start())
+            self.port = runner.addresses[0][1]
+        except OSError as e:
+            self._error = e
+            loop.run_until_complete(runner.cleanup())
+            loop.close()
+            self._ready.set()
+            return
+        self._loop = loop
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.run_until_complete(runner.cleanup())
+            loop.close()
+    
+    @staticmethod
+    def _parse_time(value):
+        """ISO date or datetime from a query; Z and UTC offsets are allowed, ValueError otherwise"""
+        if not value:
+            return None
+        if value.endswith(('Z', 'z')):
+            value = value[:-1] + '+00:00'
+        return datetime.fromisoformat(value)
+    
+    def _build(self, path, query):
+        """Return (version, JSON body) for one endpoint"""
+        deck = query.get('deck') or None
+        since = self._parse_time(query.get('since'))
+        until = self._parse_time(query.get('until'))
+        notes = query.get('notes') or None
+        tracker = self.tracker
+        body = rows = None
+        with tracker.lock:
+            version = tracker.version
+            if path == '/matches/recent':
+                limit = min(int(query.get('limit', HISTORY_PAGE_SIZE)), API_RECENT_LIMIT)
+                body = {'matches': [dict(match) for match in tracker.get_matches_page(0, limit)] if limit > 0 else []}
+            elif (path == '/stats' and notes) or (
+                    (since is not None or until is not None) and tracker.columns is None):
+                rows = tracker.match_results(deck, since, until, notes if path == '/stats' else None)
+            elif path == '/stats':
+                body = {'stats': tracker.get_deck_stats(deck, since, until)}
+            else:
+                body = tracker.get_matchup_report(deck, since, until)
+        if rows is not None:
+            stats = _count_results(rows)
+            if path == '/stats':
+                body = {'stats': stats}
+            else:
+                decks = sorted(stats)
+                body = {
+                    'decks': decks,
+                    'archetypes': sorted({opponent for deck in decks for opponent in stats[deck]['matchups']}),
+                    'cells': {deck: {opponent: _matchup_cell(results)
+                                     for opponent, results in stats[deck]['matchups'].items()} for deck in decks},
+                    'totals': {deck: _matchup_cell(stats[deck]) for deck in decks}
+                }
+        body['version'] = version
+        return version, json.dumps(body, ensure_ascii=False).encode('utf-8')
+    
+    async def _handle(self, request):
+        import asyncio
+        from aiohttp import web
+        key = request.path_qs
+        cached = self._cache.get(key)
+        if cached is None or cached[0] != self.tracker.version:
+            try:
+                cached = await asyncio.get_running_loop().run_in_executor(None, self._build, request.path, request.query)
+            except ValueError as e:
+                return web.json_response({'error': str(e)}, status=400)
+            if len(self._cache) >= API_CACHE_SIZE:
+                self._cache.clear()
+            self._cache[key] = cached
+        version, body = cached
+        etag = f'"{self._instance}-{version}"'
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if etag in [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]:
+            return web.Response(status=304, headers=headers)
+        return web.Response(body=body, content_type='application/json', headers=headers)
+
+HISTORY_PAGE_SIZE = 25
+
+class MatchHistoryView:
+    """The visible page of the Match History table and the match id behind each row"""
+    def __init__(self, tracker, page_size=HISTORY_PAGE_SIZE):
+        self.tracker = tracker
+        self.page_size = page_size
+        self.page = 0
+        self.rows = []
+        self.row_ids = []
+    
+    @property
+    def page_count(self):
+        return max(1, -(-len(self.tracker) // self.page_size))
+    
+    @staticmethod
+    def _row(match):
+        return [match['date'], match['deck'], match['opponent'], match['result'], match['notes']]
+    
+    @_instrumented
+    def load_page(self, page=None):
+        if page is not None:
+            self.page = page
+        self.page = min(max(self.page, 0), self.page_count - 1)
+        matches = self.tracker.get_matches_page(self.page, self.page_size)
+        self.rows = [self._row(match) for match in matches]
+        self.row_ids = [match['id'] for match in matches]
+        return self.rows
+    
+    def page_label(self):
+        return f'Page {self.page + 1} of {self.page_count}'
+    
+    def match_id(self, row):
+        return self.row_ids[row]
+    
+    def refresh_row(self, match_id):
+        """Re-render a single edited row in place"""
+        if match_id in self.row_ids:
+            row = self.row_ids.index(match_id)
+            self.rows[row] = self._row(self.tracker.get_match_by_id(match_id))
+        return self.rows
+
+def create_loading_window():
+    layout = [
+        [sg.Text('Loading match history...', font=('Helvetica', 10))],
+        [sg.ProgressBar(1, orientation='h', size=(30, 20), key='-PROGRESS-')]
+    ]
+    return sg.Window('Pokemon Pocket Deck Tracker', layout, font=('Helvetica', 10), finalize=True)
+
+def create_suggestion_row(key, indent):
+    """Hidden list under an input that shows its autocomplete suggestions"""
+    return [sg.pin(sg.Column([[sg.Text('', size=indent, pad=(0, 0)),
+                               sg.Listbox([], size=(20, SUGGESTION_LIMIT), key=key, enable_events=True,
+                                          no_scrollbar=True, pad=(0, 0))]],
+                             key=key + 'ROW', visible=False, pad=(0, 0)))]
+
+def bind_suggestions(window):
+    """Down in a deck or opponent input takes its top suggestion"""
+    for input_key in SUGGESTION_INPUTS:
+        window[input_key].bind('<Down>', '+DOWN')
+    return window
+
+def hide_suggestions(window):
+    for _, list_key in SUGGESTION_INPUTS.values():
+        window[list_key + 'ROW'].update(visible=False)
+
+def handle_suggestion_event(window, tracker, event, values):
+    """Autocomplete the deck and opponent inputs; returns True if the event was theirs"""
+    for input_key, (field, list_key) in SUGGESTION_INPUTS.items():
+        if event == input_key:
+            text = values[input_key].strip()
+            names = tracker.suggest_names(field, text) if text else []
+            if names == [text]:
+                names = []
+            window[list_key].update(values=names)
+            window[list_key + 'ROW'].update(visible=bool(names))
+            return True
+        if event in (list_key, input_key + '+DOWN'):
+            if event == list_key:
+                choice = values[list_key][0] if values[list_key] else None
+            else:
+                text = values[input_key].strip()
+                choice = next(iter(tracker.suggest_names(field, text, 1)), None) if text else None
+            if choice:
+                window[input_key].update(choice)
+                window[input_key].set_focus()
+            window[list_key + 'ROW'].update(visible=False)
+            return True
+    return False
 
 def create_selection_window(title, options):
     layout = [
         [sg.Text(f'Select {title}:', font=('Helvetica', 10))],
-        [sg.Listbox(values=sorted(options), size=(30, 6), key='-SELECTION-', font=('Helvetica', 10))],
+        [sg.Listbox(values=options, size=(30, 6), key='-SELECTION-', font=('Helvetica', 10))],
         [sg.Button('Select', size=(10, 1)), sg.Button('Cancel', size=(10, 1))]
     ]
     window = sg.Window(f'Select {title}', layout, modal=True, font=('Helvetica', 10))
@@ -176,21 +2813,23 @@ def create_selection_window(title, options):
             window.close()
             return selection
 
-def create_matches_window(tracker):
-    matches = tracker.get_all_matches()
-    
+@_instrumented
+def create_matches_window(view):
     headers = ['Date', 'Deck', 'Opponent', 'Result', 'Notes']
-    data = [[m['date'], m['deck'], m['opponent'], m['result'], m['notes']] for m in matches]
+    data = view.load_page()
     
     layout = [
         [sg.Table(values=data,
                  headings=headers,
-                 auto_size_columns=True,
+                 auto_size_columns=False,
+                 col_widths=[15, 18, 18, 6, 30],
                  justification='left',
-                 num_rows=min(25, len(data)),
+                 num_rows=view.page_size,
                  key='-TABLE-',
                  enable_events=True,
                  font=('Helvetica', 10))],
+        [sg.Button('< Prev', size=(8, 1)), sg.Text(view.page_label(), key='-PAGE-', size=(16, 1), justification='center'),
+         sg.Button('Next >', size=(8, 1))],
         [sg.Button('Edit', size=(10, 1)), sg.Button('Delete', size=(10, 1)), 
          sg.Button('Close', size=(10, 1))]
     ]
@@ -199,21 +2838,23 @@ def create_matches_window(tracker):
 
 def create_edit_match_window(match):
     layout = [
-        [sg.Text("Your Deck:", size=(12, 1)), sg.Input(key='-DECK-', size=(20, 1)), 
+        [sg.Text("Your Deck:", size=(12, 1)), sg.Input(match['deck'], key='-DECK-', size=(20, 1), enable_events=True), 
         sg.Button("Select Deck", size=(10, 1))],
-        [sg.Text("Opp. Archetype:", size=(12, 1)), sg.Input(key='-ARCHETYPE-', size=(20, 1)), 
+        create_suggestion_row('-DECK_SUGGESTIONS-', (12, 1)),
+        [sg.Text("Opp. Archetype:", size=(12, 1)), sg.Input(match['opponent'], key='-OPPONENT-', size=(20, 1), enable_events=True), 
         sg.Button("Select Archetype", size=(10, 1))],
-        [sg.Text("Notes:", size=(12, 1)), sg.Input(key='-NOTES-', size=(20, 1)), 
-        sg.Button("Show Stats", size=(10, 1))],
+        create_suggestion_row('-OPPONENT_SUGGESTIONS-', (12, 1)),
+        [sg.Text("Notes:", size=(12, 1)), sg.Input(match['notes'], key='-NOTES-', size=(20, 1))],
         [sg.Text("Result:", size=(12, 1))],
-        [sg.Radio("Win", "RESULT", key='-WIN-', default=True),
-        sg.Radio("Loss", "RESULT", key='-LOSS-'),
-        sg.Radio("Draw", "RESULT", key='-DRAW-')],
-        [sg.Button("Submit"), sg.Button("Exit")]
+        [sg.Radio("Win", "RESULT", key='-WIN-', default=match['result'] == 'win'),
+        sg.Radio("Loss", "RESULT", key='-LOSS-', default=match['result'] == 'loss'),
+        sg.Radio("Draw", "RESULT", key='-DRAW-', default=match['result'] == 'draw')],
+        [sg.Button("Save Changes"), sg.Button("Cancel")]
     ]
     
-    return sg.Window('Edit Match', layout, modal=True, finalize=True, font=('Helvetica', 10))
+    return bind_suggestions(sg.Window('Edit Match', layout, modal=True, finalize=True, font=('Helvetica', 10)))
 
+@_instrumented
 def create_deck_management_window(tracker):
     decks = sorted(list(tracker.decks))
     
@@ -227,7 +2868,7 @@ def create_deck_management_window(tracker):
                        font=('Helvetica', 10))],
             [sg.Column([
                 [sg.Button('Rename', size=(12, 1)), sg.Button('Delete', size=(12, 1))],
-                [sg.Button('Close', size=(12, 1))]
+                [sg.Button('Clean Up...', size=(12, 1)), sg.Button('Close', size=(12, 1))]
             ], justification='center')]
         ], justification='center', pad=(10, 10))]
     ]
@@ -252,6 +2893,56 @@ def create_rename_deck_window(old_name):
                     finalize=True,
                     font=('Helvetica', 10))
 
+def _merge_label(kind, keep, variants):
+    return f"{kind}: {', '.join(variants)} -> {keep}"
+
+@_instrumented
+def create_cleanup_window(tracker, suggestions):
+    decks = sorted(tracker.decks)
+    archetypes = sorted(tracker.archetypes)
+    label_size = (14, 1)
+    
+    layout = [
+        [sg.Text('Clean Up Names', font=('Helvetica', 16), pad=(0, 10))],
+        [sg.Frame('Suggested merges', [
+            [sg.Listbox(values=suggestions, size=(60, 6), key='-SUGGESTIONS-',
+                        select_mode=sg.LISTBOX_SELECT_MODE_EXTENDED)]
+        ])],
+        [sg.Frame('Rename or merge', [
+            [sg.Radio('Decks', 'KIND', key='-KIND_DECK-', default=True, enable_events=True),
+             sg.Radio('Archetypes', 'KIND', key='-KIND_ARCHETYPE-', enable_events=True)],
+            [sg.Listbox(values=decks, size=(60, 6), key='-NAMES-', select_mode=sg.LISTBOX_SELECT_MODE_EXTENDED)],
+            [sg.Text('Into:', size=label_size), sg.Input(key='-INTO-', size=(30, 1)),
+             sg.Button('Add Rename', size=(12, 1))]
+        ])],
+        [sg.Frame('Bulk edit matches', [
+            [sg.Text('Where deck:', size=label_size), sg.Combo([''] + decks, key='-WHERE_DECK-', size=(20, 1)),
+             sg.Text('opponent:'), sg.Combo([''] + archetypes, key='-WHERE_OPPONENT-', size=(20, 1))],
+            [sg.Text('Notes contain:', size=label_size), sg.Input(key='-WHERE_NOTES-', size=(30, 1))],
+            [sg.Text('Set deck:', size=label_size), sg.Input(key='-SET_DECK-', size=(20, 1)),
+             sg.Text('opponent:'), sg.Input(key='-SET_OPPONENT-', size=(20, 1))],
+            [sg.Text('Set result:', size=label_size),
+             sg.Combo(['', 'win', 'loss', 'draw'], key='-SET_RESULT-', size=(8, 1), readonly=True)]
+        ])],
+        [sg.Multiline('', size=(62, 5), key='-PLAN-', disabled=True)],
+        [sg.Button('Apply', size=(12, 1)), sg.Button('Clear', size=(12, 1)), sg.Button('Close', size=(12, 1))]
+    ]
+    
+    return sg.Window('Clean Up Names', layout, modal=True, finalize=True, font=('Helvetica', 10))
+
+STATS_PERIODS = {'All Time': None, 'Last 7 Days': 7, 'Last 30 Days': 30}
+
+def create_metrics_window():
+    layout = [
+        [sg.Multiline(format_metrics(metrics.snapshot()), size=(90, 25), key='-METRICS-', disabled=True,
+                      font=('Courier', 9))],
+        [sg.Button('Refresh', size=(10, 1)), sg.Button('Reset', size=(10, 1)),
+         sg.Button('Disable' if metrics.enabled else 'Enable', key='-TOGGLE_METRICS-', size=(10, 1)),
+         sg.Button('Close', size=(10, 1))]
+    ]
+    return sg.Window('Metrics', layout, font=('Helvetica', 10), finalize=True)
+
+@_instrumented
 def create_main_window():
     sg.theme('LightGrey1')
     button_size = (12, 1)
@@ -269,11 +2960,13 @@ def create_main_window():
     
     match_details_layout = [
         [sg.Text('Your Deck:', size=label_size), 
-         sg.Input(key='-DECK-', size=input_size), 
+         sg.Input(key='-DECK-', size=input_size, enable_events=True), 
          sg.Button('Select Deck', size=button_size)],
+        create_suggestion_row('-DECK_SUGGESTIONS-', label_size),
         [sg.Text('Opponent Archetype:', size=label_size), 
-         sg.Input(key='-OPPONENT-', size=input_size), 
+         sg.Input(key='-OPPONENT-', size=input_size, enable_events=True), 
          sg.Button('Select Archetype', size=button_size)],
+        create_suggestion_row('-OPPONENT_SUGGESTIONS-', label_size),
         [sg.Text('Result:', size=label_size), 
          sg.Radio('Win', 'RESULT', key='-WIN-', default=True), 
          sg.Radio('Draw', 'RESULT', key='-DRAW-'),
@@ -287,6 +2980,10 @@ def create_main_window():
         [sg.Text('Select Deck:', size=label_size), 
          sg.Combo(['All Decks'], key='-STAT_DECK-', size=(18,1)), 
          sg.Button('Show Stats', size=button_size)],
+        [sg.Text('Period:', size=label_size), 
+         sg.Combo(list(STATS_PERIODS), default_value='All Time', key='-STAT_PERIOD-', size=(18,1), readonly=True)],
+        [sg.Text('Notes contain:', size=label_size), 
+         sg.Input(key='-STAT_NOTES-', size=input_size, tooltip='e.g. "went second" or "brick*"')],
         [sg.Multiline(size=(45, 10), key='-STATS-', disabled=True, font=('Courier', 10))]
     ]
 
@@ -294,40 +2991,78 @@ def create_main_window():
         header_layout,
         [sg.Frame('Match Details', match_details_layout, font=('Helvetica', 10), pad=section_padding)],
         [sg.Frame('View Stats', stats_layout, font=('Helvetica', 10), pad=section_padding)],
-        [sg.Column([
+        [sg.Text('', key='-SAVE_STATUS-', size=(30, 1), font=('Helvetica', 8)),
+         sg.Column([
             [sg.Button('Edit Decks', size=(12, 1)),
              sg.Button('View Match History', size=(15, 1)), 
              sg.Button('Exit', size=(10, 1))]
         ], justification='right', pad=section_padding)]
     ]
 
-    return sg.Window('Pokemon Pocket Deck Tracker', 
-                     layout, 
-                     finalize=True, 
-                     font=('Helvetica', 10),
-                     resizable=True)
+    return bind_suggestions(sg.Window('Pokemon Pocket Deck Tracker', 
+                                      layout, 
+                                      finalize=True, 
+                                      font=('Helvetica', 10),
+                                      resizable=True))
 
-def main():
-    tracker = PokemonDeckTracker()
+def main(api_port=None, columnar=None):
+    _import_gui()
     data_dir = 'data'
     if not os.path.exists(data_dir):
         os.makedirs(data_dir)
     
-    filename = os.path.join(data_dir, 'pokemon_stats.json')
+    loading_window = None
     
-    if not tracker.load_from_file(filename):
+    def show_progress(done, total):
+        # Only loads that take more than one step are worth a window
+        nonlocal loading_window
+        if loading_window is None:
+            if done >= total:
+                return
+            loading_window = create_loading_window()
+        loading_window['-PROGRESS-'].update(done, total)
+        loading_window.read(timeout=0)
+    
+    tracker, filename = open_tracker(data_dir, progress=show_progress, columnar=columnar)
+    loaded = tracker.load_from_file(filename, show_progress)
+    if loading_window is not None:
+        loading_window.close()
+    if not loaded:
         sg.popup('Welcome to Pokemon Pocket Deck Tracker!\nNo existing data found, starting fresh.')
     
     main_window = create_main_window()
+    main_window['-SAVE_STATUS-'].update(f'{len(tracker)} matches, ready in {time.perf_counter() - _STARTED:.2f}s')
+    server = None
+    if api_port:
+        server = StatsServer(tracker, port=api_port)
+        try:
+            server.start()
+        except (ImportError, OSError) as e:
+            sg.popup(f'The stats API could not be started: {e}')
+            server = None
+    # Hidden metrics panel
+    main_window.bind('<F12>', '-SHOW_METRICS-')
+    saver = BackgroundSaver(tracker, filename,
+                            on_state=lambda state: main_window.write_event_value('-SAVE_STATE-', state))
+    
+    def save():
+        saver.mark_dirty()
+        main_window['-SAVE_STATUS-'].update('Unsaved changes...')
     
     while True:
         event, values = main_window.read()
         
         if event == sg.WIN_CLOSED or event == 'Exit':
             break
+        
+        elif event == '-SAVE_STATE-':
+            main_window['-SAVE_STATUS-'].update(saver.state())
+        
+        elif handle_suggestion_event(main_window, tracker, event, values):
+            pass
             
         elif event == 'Select Deck':
-            deck_list = sorted(list(tracker.decks))
+            deck_list = tracker.suggest_names('deck', '', None)
             if deck_list:
                 choice = create_selection_window('Deck', deck_list)
                 if choice:
@@ -336,7 +3071,7 @@ def main():
                 sg.popup('No decks found. Add your first match to create a deck!')
                 
         elif event == 'Select Archetype':
-            archetype_list = sorted(list(tracker.archetypes))
+            archetype_list = tracker.suggest_names('opponent', '', None)
             if archetype_list:
                 choice = create_selection_window('Archetype', archetype_list)
                 if choice:
@@ -358,7 +3093,7 @@ def main():
             result = None if draw else won
             
             tracker.add_match(deck, opponent, result, notes)
-            tracker.save_to_file(filename) 
+            save()
             main_window['-STAT_DECK-'].update(values=['All Decks'] + sorted(list(tracker.decks)))
             main_window['-STAT_DECK-'].update(deck)  
             stats_text = tracker.get_stats_text(deck)
@@ -367,15 +3102,32 @@ def main():
             main_window['-DECK-'].update('')
             main_window['-OPPONENT-'].update('')
             main_window['-NOTES-'].update('')
+            hide_suggestions(main_window)
             sg.popup('Match added successfully!')
             
         elif event == 'Show Stats':
             selected_deck = values['-STAT_DECK-']
             if selected_deck == 'All Decks':
                 selected_deck = None
-            stats_text = tracker.get_stats_text(selected_deck)
+            days = STATS_PERIODS.get(values['-STAT_PERIOD-'])
+            since = datetime.now() - timedelta(days=days) if days else None
+            stats_text = tracker.get_stats_text(selected_deck, since=since, notes=values['-STAT_NOTES-'].strip() or None)
             main_window['-STATS-'].update(stats_text)
             
+        elif event == '-SHOW_METRICS-':
+            metrics_window = create_metrics_window()
+            while True:
+                metrics_event, _ = metrics_window.read()
+                if metrics_event in (sg.WIN_CLOSED, 'Close'):
+                    break
+                if metrics_event == 'Reset':
+                    metrics.reset()
+                elif metrics_event == '-TOGGLE_METRICS-':
+                    metrics.enable(not metrics.enabled)
+                    metrics_window['-TOGGLE_METRICS-'].update('Disable' if metrics.enabled else 'Enable')
+                metrics_window['-METRICS-'].update(format_metrics(metrics.snapshot()))
+            metrics_window.close()
+            
         elif event == 'Edit Decks':
             deck_window = create_deck_management_window(tracker)
             
@@ -407,7 +3159,7 @@ def main():
                                 
                             success, message = tracker.rename_deck(old_name, new_name)
                             if success:
-                                tracker.save_to_file(filename) 
+                                save()
                                 sg.popup('Deck renamed successfully!')
                                 deck_window['-DECK_LIST-'].update(values=sorted(list(tracker.decks)))
                                 main_window['-STAT_DECK-'].update(values=['All Decks'] + sorted(list(tracker.decks)))
@@ -427,22 +3179,95 @@ def main():
                                      title='Confirm Deletion') == 'Yes':
                         success, message = tracker.delete_deck(deck_name)
                         if success:
-                            tracker.save_to_file(filename)  
+                            save()
                             sg.popup(message)
                             deck_window['-DECK_LIST-'].update(values=sorted(list(tracker.decks)))
                             main_window['-STAT_DECK-'].update(values=['All Decks'] + sorted(list(tracker.decks)))
                         else:
                             sg.popup_error(message)
             
+                elif deck_event == 'Clean Up...':
+                    merges = tracker.suggest_merges()
+                    suggestions = {}
+                    for kind, groups in (('Deck', merges['decks']), ('Archetype', merges['archetypes'])):
+                        for keep, variants in groups:
+                            suggestions[_merge_label(kind, keep, variants)] = (kind, keep, variants)
+                    cleanup_window = create_cleanup_window(tracker, list(suggestions))
+                    renames = {'Deck': {}, 'Archetype': {}}
+                    
+                    while True:
+                        cleanup_event, cleanup_values = cleanup_window.read()
+                        
+                        if cleanup_event in (sg.WIN_CLOSED, 'Close'):
+                            break
+                        
+                        elif cleanup_event in ('-KIND_DECK-', '-KIND_ARCHETYPE-'):
+                            names = tracker.decks if cleanup_values['-KIND_DECK-'] else tracker.archetypes
+                            cleanup_window['-NAMES-'].update(values=sorted(names))
+                            
+                        elif cleanup_event == 'Add Rename':
+                            into = cleanup_values['-INTO-'].strip()
+                            if not cleanup_values['-NAMES-'] or not into:
+                                sg.popup_error('Please select names and enter the name to keep')
+                                continue
+                            kind = 'Deck' if cleanup_values['-KIND_DECK-'] else 'Archetype'
+                            for name in cleanup_values['-NAMES-']:
+                                renames[kind][name] = into
+                            
+                        elif cleanup_event == 'Clear':
+                            renames = {'Deck': {}, 'Archetype': {}}
+                            cleanup_window['-SUGGESTIONS-'].update(set_to_index=[])
+                        
+                        elif cleanup_event == 'Apply':
+                            plan = {kind: dict(names) for kind, names in renames.items()}
+                            for label in cleanup_values['-SUGGESTIONS-']:
+                                kind, keep, variants = suggestions[label]
+                                for name in variants:
+                                    plan[kind].setdefault(name, keep)
+                            where = {'deck': cleanup_values['-WHERE_DECK-'],
+                                     'opponent': cleanup_values['-WHERE_OPPONENT-'],
+                                     'notes': cleanup_values['-WHERE_NOTES-'].strip()}
+                            changes = {field: value for field, value in (
+                                ('deck', cleanup_values['-SET_DECK-'].strip()),
+                                ('opponent', cleanup_values['-SET_OPPONENT-'].strip()),
+                                ('result', cleanup_values['-SET_RESULT-'])) if value}
+                            if not plan['Deck'] and not plan['Archetype'] and not changes:
+                                sg.popup_error('Nothing to apply')
+                                continue
+                            if changes and not any(where.values()) and sg.popup_yes_no(
+                                    'No filter is set, so the bulk edit changes every match. Continue?') != 'Yes':
+                                continue
+                            success, message = tracker.batch_update(plan['Deck'], plan['Archetype'], where, changes)
+                            if success:
+                                save()
+                                sg.popup(message)
+                                deck_window['-DECK_LIST-'].update(values=sorted(list(tracker.decks)))
+                                main_window['-STAT_DECK-'].update(values=['All Decks'] + sorted(list(tracker.decks)))
+                                break
+                            else:
+                                sg.popup_error(message)
+                            continue
+                        
+                        cleanup_window['-PLAN-'].update('\n'.join(
+                            f'{kind}: {old} -> {new}' for kind, names in renames.items() for old, new in names.items()))
+                    
+                    cleanup_window.close()
+            
             deck_window.close()
             
         elif event == 'View Match History':
-            matches_window = create_matches_window(tracker)
+            history = MatchHistoryView(tracker)
+            matches_window = create_matches_window(history)
             while True:
                 matches_event, matches_values = matches_window.read()
                 
                 if matches_event in (sg.WIN_CLOSED, 'Close'):
                     break
+                
+                elif matches_event in ('< Prev', 'Next >'):
+                    step = -1 if matches_event == '< Prev' else 1
+                    matches_window['-TABLE-'].update(values=history.load_page(history.page + step))
+                    matches_window['-PAGE-'].update(history.page_label())
                     
                 elif matches_event == 'Edit':
                     if len(matches_values['-TABLE-']) == 0:
@@ -450,7 +3275,7 @@ def main():
                         continue
                         
                     selected_row = matches_values['-TABLE-'][0]
-                    match_id = tracker.get_all_matches()[selected_row]['id']
+                    match_id = history.match_id(selected_row)
                     match = tracker.get_match_by_id(match_id)
                     
                     if match:
@@ -460,28 +3285,46 @@ def main():
                             
                             if edit_event in (sg.WIN_CLOSED, 'Cancel'):
                                 break
+                            
+                            elif handle_suggestion_event(edit_window, tracker, edit_event, edit_values):
+                                pass
+                            
+                            elif edit_event == 'Select Deck':
+                                choice = create_selection_window('Deck', tracker.suggest_names('deck', '', None))
+                                if choice:
+                                    edit_window['-DECK-'].update(choice)
+                            
+                            elif edit_event == 'Select Archetype':
+                                choice = create_selection_window('Archetype', tracker.suggest_names('opponent', '', None))
+                                if choice:
+                                    edit_window['-OPPONENT-'].update(choice)
                                 
                             elif edit_event == 'Save Changes':
+                                deck = edit_values['-DECK-'].strip()
+                                opponent = edit_values['-OPPONENT-'].strip()
+                                if not deck or not opponent:
+                                    sg.popup_error('Please enter both deck and opponent archetype!')
+                                    continue
                                 tracker.edit_match(
                                     match_id,
-                                    edit_values['-DECK-'].strip(),
-                                    edit_values['-OPPONENT-'].strip(),
-                                    edit_values['-WIN-'],
+                                    deck,
+                                    opponent,
+                                    None if edit_values['-DRAW-'] else edit_values['-WIN-'],
                                     edit_values['-NOTES-'].strip()
                                 )
-                                tracker.save_to_file(filename)
-                                tracker.last_used_deck = edit_values['-DECK-'].strip()
+                                save()
+                                tracker.last_used_deck = deck
 
                                 main_window['-STAT_DECK-'].update(values=['All Decks'] + sorted(list(tracker.decks)))
                                 main_window['-STAT_DECK-'].update(tracker.last_used_deck)
                                 main_window['-STATS-'].update(tracker.get_stats_text(tracker.last_used_deck))
+                                matches_window['-TABLE-'].update(values=history.refresh_row(match_id),
+                                                                 select_rows=[selected_row])
 
                                 sg.popup('Match updated successfully!')
                                 break
                                 
                         edit_window.close()
-                        matches_window.close()
-                        matches_window = create_matches_window(tracker)
                         
                 elif matches_event == 'Delete':
                     if len(matches_values['-TABLE-']) == 0:
@@ -490,9 +3333,9 @@ def main():
                         
                     if sg.popup_yes_no('Are you sure you want to delete this match?') == 'Yes':
                         selected_row = matches_values['-TABLE-'][0]
-                        match_id = tracker.get_all_matches()[selected_row]['id']
+                        match_id = history.match_id(selected_row)
                         tracker.delete_match(match_id)
-                        tracker.save_to_file(filename)
+                        save()
                         sg.popup('Match deleted successfully!')
                         main_window['-STAT_DECK-'].update(values=['All Decks'] + sorted(list(tracker.decks)))
                         if tracker.last_used_deck in tracker.decks:
@@ -501,13 +3344,440 @@ def main():
                         else:
                             main_window['-STAT_DECK-'].update('All Decks')
                             main_window['-STATS-'].update(tracker.get_stats_text(None))
-                        matches_window.close()
-                        matches_window = create_matches_window(tracker)
+                        matches_window['-TABLE-'].update(values=history.load_page())
+                        matches_window['-PAGE-'].update(history.page_label())
             
             matches_window.close()
             main_window['-STAT_DECK-'].update(values=['All Decks'] + sorted(list(tracker.decks)))
     
+    if server is not None:
+        server.stop()
+    saver.on_state = None
+    saved, message = saver.close()
+    if not saved:
+        sg.popup_error(message)
     main_window.close()
+    tracker.close()
+
+IMPORT_CHUNK_SIZE = 10000
+RESULT_ALIASES = {
+    'win': 'win', 'w': 'win', 'won': 'win', '1': 'win', 'true': 'win',
+    'loss': 'loss', 'l': 'loss', 'lost': 'loss', 'lose': 'loss', '0': 'loss', 'false': 'loss',
+    'draw': 'draw', 'd': 'draw', 'tie': 'draw', '': 'draw', 'none': 'draw', 'null': 'draw'
+}
+
+def _normalize_date(date):
+    """Imported dates in any ISO form -> the tracker's date format"""
+    date = date.strip()
+    if len(date) == 16 and date[10] == ' ' and parse_date(date):
+        return date
+    return datetime.fromisoformat(date).strftime(DATE_FORMAT)
+
+def _read_rows(path, fmt=None):
+    """Yield raw rows from a CSV (with a header line), JSONL match log or JSON export"""
+    if fmt is None:
+        extension = path.lower().rsplit('.', 1)[-1]
+        fmt = {'jsonl': 'jsonl', 'ndjson': 'jsonl', 'json': 'json'}.get(extension, 'csv')
+    if fmt == 'json':
+        # A list of rows, or a document written by export_json / an old pokemon_stats.json
+        with open(path, 'rb') as f:
+            stream = _JsonStream(f)
+            if stream.peek() == '[':
+                yield from stream.elements()
+                return
+            for key in stream.keys():
+                if key == 'matches':
+                    yield from stream.elements()
+                else:
+                    stream.value()
+        return
+    # utf-8-sig drops the byte order mark spreadsheet programs put at the start
+    with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+        if fmt == 'csv':
+            import csv
+            yield from csv.DictReader(f)
+            return
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+
+def _parse_rows(rows, skipped):
+    """Normalize raw rows into add_matches input; bad rows are counted in skipped[0]"""
+    for row in rows:
+        try:
+            deck = row['deck'].strip()
+            opponent = (row.get('opponent') or row.get('archetype') or '').strip()
+            if 'result' in row:
+                result = RESULT_ALIASES[str(row['result']).strip().lower()]
+            else:
+                won = row.get('won')
+                if isinstance(won, str):
+                    # CSV cells are text: "false" and "0" are losses
+                    result = RESULT_ALIASES[won.strip().lower()]
+                else:
+                    result = 'draw' if won is None else ('win' if won else 'loss')
+            date = row.get('date')
+            parsed = {
+                'deck': deck,
+                'opponent': opponent,
+                'result': result,
+                'notes': (row.get('notes') or '').strip(),
+                'date': _normalize_date(date) if date else None
+            }
+        except (KeyError, AttributeError, TypeError, ValueError):
+            skipped[0] += 1
+            continue
+        if not deck or not opponent:
+            skipped[0] += 1
+            continue
+        yield parsed
+
+def _chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def import_matches(tracker, paths, fmt=None, chunk_size=IMPORT_CHUNK_SIZE):
+    """Stream match logs into the tracker chunk by chunk; returns (imported, skipped).
+    
+    The rows are not journaled one by one: the next save writes a snapshot
+    (SQLite gets each chunk as it is added).
+    """
+    tracker.storage.begin_bulk()
+    imported = 0
+    skipped = [0]
+    for path in paths:
+        for chunk in _chunked(_parse_rows(_read_rows(path, fmt), skipped), chunk_size):
+            imported += len(tracker.add_matches(chunk))
+    return imported, skipped[0]
+
+TRACKER_FILE_STORAGES = {'.json': lambda: JsonStorage(journal=True), '.pdt': BinaryStorage, '.db': SqliteStorage}
+TRACKER_FILE_STEM = 'pokemon_stats'
+
+def tracker_files(patterns):
+    """Expand directories and globs into tracker data files.
+    
+    Directories are searched recursively and, like globs, only yield files
+    named pokemon_stats.json/.pdt/.db, so deltas, sync state and exports
+    lying next to them are skipped. A file named outright may have any name
+    with one of those extensions. When one directory holds the same history
+    in several formats (pokemon_stats.json next to its migrated .pdt), only
+    the most recently written file is used.
+    """
+    paths = []
+    for pattern in patterns:
+        if not glob.has_magic(pattern) and os.path.isfile(pattern):
+            paths.append((pattern, True))
+            continue
+        for path in glob.glob(pattern, recursive=True):
+            if os.path.isdir(path):
+                paths.extend((found, False) for found in
+                             glob.glob(os.path.join(glob.escape(path), '**', TRACKER_FILE_STEM + '.*'), recursive=True))
+            else:
+                paths.append((path, False))
+    
+    found = {}
+    for path, named in paths:
+        stem, extension = os.path.splitext(os.path.abspath(path))
+        if extension.lower() not in TRACKER_FILE_STORAGES or not os.path.isfile(path):
+            continue
+        if not named and os.path.basename(stem) != TRACKER_FILE_STEM:
+            continue
+        current = found.get(stem)
+        if current is None or os.path.getmtime(path) > os.path.getmtime(current):
+            found[stem] = path
+    return sorted(found.values())
+
+def file_deck_stats(filename):
+    """Load one tracker file and reduce it to plain deck/matchup counters.
+    
+    Returns (stats, match count, error); a file that can't be read gives
+    empty stats and the reason, so one bad file doesn't sink the others.
+    """
+    try:
+        storage = TRACKER_FILE_STORAGES[os.path.splitext(filename)[1].lower()]()
+        tracker = PokemonDeckTracker(storage)
+        try:
+            if not tracker.load_from_file(filename):
+                return {}, 0, 'file not found'
+            return _plain_stats(tracker.get_deck_stats()), len(tracker), None
+        finally:
+            tracker.close()
+    except Exception as e:
+        return {}, 0, str(e) or type(e).__name__
+
+def merge_deck_stats(partials):
+    """Sum get_deck_stats()-shaped counters; decks and matchups keep first-seen order"""
+    merged = _new_deck_stats()
+    for stats in partials:
+        for deck, source in stats.items():
+            target = merged[deck]
+            for key in ('wins', 'losses', 'draws'):
+                target[key] += source[key]
+            for opponent, results in source['matchups'].items():
+                matchup = target['matchups'][opponent]
+                for key in ('wins', 'losses', 'draws'):
+                    matchup[key] += results[key]
+    return merged
+
+def aggregate_files(paths, workers=None, parallel=True):
+    """Team-wide stats over many tracker files, one process per file at a time.
+    
+    Returns (stats, match_count, errors) where errors lists (path, reason)
+    for the files that couldn't be read. Loading and reducing each file runs
+    in a ProcessPoolExecutor; only the small per-file counters travel back to
+    be merged.
+    """
+    if parallel and len(paths) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(file_deck_stats, paths))
+    else:
+        results = [file_deck_stats(path) for path in paths]
+    errors = [(path, error) for path, (_, _, error) in zip(paths, results) if error is not None]
+    return merge_deck_stats(stats for stats, _, _ in results), sum(count for _, count, _ in results), errors
+
+def write_delta(delta, filename):
+    """Write a delta from export_changes as compact JSON"""
+    tmp_filename = filename + '.tmp'
+    with open(tmp_filename, 'w', encoding='utf-8') as f:
+        json.dump(delta, f, ensure_ascii=False, separators=(',', ':'))
+        metrics.record_bytes('delta', f.tell())
+    os.replace(tmp_filename, filename)
+
+def read_delta(filename):
+    with open(filename, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def device_name():
+    """This machine's name in sync folders: $DECK_TRACKER_DEVICE or the host name"""
+    name = os.environ.get('DECK_TRACKER_DEVICE') or platform.node() or 'device'
+    return re.sub(r'[^\w.-]+', '_', name)
+
+def _sync_marker(tracker):
+    """[uid, modified] of the tracker's newest change, or None for an empty history"""
+    index = tracker._sync_entries()
+    if not index:
+        return None
+    entry = index[next(reversed(index))]
+    return [entry['uid'], entry['modified']]
+
+def sync_folder(tracker, filename, folder, device=None):
+    """Exchange changes with other devices through a shared folder (a synced drive, a USB stick...).
+    
+    Every device writes what changed since its last sync as
+    <device>-<n>.delta.json, where n only ever grows and no file is written
+    twice, and merges the other devices' files it has not seen yet;
+    <device>.sync.json in the folder remembers both. It also remembers the
+    newest change the tracker held at the last sync: when that change is gone,
+    the data was restored from a backup, so everything is sent again and every
+    delta in the folder, this device's own included, is merged again to win
+    back what the backup lacked. The tracker is saved before the state is, so
+    an interrupted sync is simply repeated.
+    Returns (matches exported, list of (delta file, merge message)).
+    """
+    device = device or device_name()
+    os.makedirs(folder, exist_ok=True)
+    state_filename = os.path.join(folder, device + '.sync.json')
+    try:
+        with open(state_filename, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        state = {'exported': -1, 'merged': {}}
+    
+    files = []
+    for path in glob.glob(os.path.join(glob.escape(folder), '*' + DELTA_SUFFIX)):
+        other, _, number = os.path.basename(path)[:-len(DELTA_SUFFIX)].rpartition('-')
+        if other and number.isdigit():
+            files.append((other, int(number), path))
+    files.sort()
+    written = max([number for other, number, _ in files if other == device] + [state.get('written', 0)])
+    
+    merged = []
+    with tracker.lock:
+        marker = state.get('marker')
+        if marker is not None:
+            entry = tracker._sync_entries().get(marker[0])
+            restored = entry is None or entry['modified'] < marker[1]
+        else:
+            restored = state['exported'] > tracker._journal_seq
+        if restored:
+            state['exported'] = -1
+            state['merged'] = {}
+        delta = tracker.export_changes(state['exported'])
+        for other, number, path in files:
+            if (other != device or restored) and number > state['merged'].get(other, -1):
+                merged.append((path, tracker.merge_changes(read_delta(path))[1]))
+                if other != device:
+                    state['merged'][other] = number
+        # What was just merged came from the other devices, so it is not sent back
+        state['exported'] = tracker._journal_seq
+        state['marker'] = _sync_marker(tracker)
+    exported = len(delta['matches']) + len(delta['deleted'])
+    if exported:
+        written += 1
+        while os.path.exists(os.path.join(folder, f'{device}-{written}{DELTA_SUFFIX}')):
+            written += 1
+        write_delta(delta, os.path.join(folder, f'{device}-{written}{DELTA_SUFFIX}'))
+    state['written'] = written
+    tracker.save_to_file(filename)
+    with open(state_filename, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    return exported, merged
+
+def cli(argv=None):
+    """Headless entry point; without a command it starts the GUI"""
+    import argparse
+    parser = argparse.ArgumentParser(prog='main.py', description='Pokemon Pocket Deck Tracker')
+    parser.add_argument('--data-dir', default='data', help='directory holding the tracker data')
+    parser.add_argument('--storage', choices=('binary', 'json', 'sqlite'),
+                        help='storage backend (default: $DECK_TRACKER_STORAGE or binary)')
+    parser.add_argument('--metrics', metavar='FILE',
+                        help="record call timings and bytes written, and write them as JSON to FILE ('-' for stdout) on exit")
+    parser.add_argument('--profile', metavar='FILE', help='profile the session with cProfile and save the stats to FILE')
+    parser.add_argument('--api-port', type=int, default=os.environ.get('DECK_TRACKER_API_PORT'),
+                        help='serve the HTTP stats API on localhost:PORT while the GUI runs (needs aiohttp)')
+    parser.add_argument('--columnar', action='store_true', default=None,
+                        help='keep a NumPy column store for fast date-range stats (default: $DECK_TRACKER_COLUMNAR=1; needs numpy)')
+    commands = parser.add_subparsers(dest='command')
+    
+    import_parser = commands.add_parser('import', help='bulk import matches from CSV, JSONL or JSON files')
+    import_parser.add_argument('files', nargs='+')
+    import_parser.add_argument('--format', choices=('csv', 'jsonl', 'json'), help='input format (default: from the file extension)')
+    import_parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE)
+    
+    export_parser = commands.add_parser('export', help='write the whole history as a JSON document')
+    export_parser.add_argument('file')
+    
+    aggregate_parser = commands.add_parser('aggregate', help='combined stats over many tracker files')
+    aggregate_parser.add_argument('paths', nargs='+', help='tracker files, directories or glob patterns')
+    aggregate_parser.add_argument('--workers', type=int, help='worker processes (default: one per CPU)')
+    aggregate_parser.add_argument('--serial', action='store_true', help='load the files one by one in this process')
+    
+    sync_parser = commands.add_parser('sync', help='exchange changes with other devices through a shared folder')
+    sync_parser.add_argument('folder')
+    sync_parser.add_argument('--device', help='name of this device in the folder (default: $DECK_TRACKER_DEVICE or the host name)')
+    
+    changes_parser = commands.add_parser('changes', help='write the changes since a sequence number as a delta file')
+    changes_parser.add_argument('file')
+    changes_parser.add_argument('--since', type=int, default=-1, help='last sequence number the other device has (default: everything)')
+    
+    merge_parser = commands.add_parser('merge', help='merge delta files written by another device')
+    merge_parser.add_argument('files', nargs='+')
+    
+    serve_parser = commands.add_parser('serve', help='serve the HTTP stats API without the GUI (needs aiohttp)')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=API_PORT)
+    
+    args = parser.parse_args(argv)
+    if args.metrics or os.environ.get('DECK_TRACKER_METRICS') == '1':
+        metrics.enable()
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        return _run_command(args)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+        if args.metrics:
+            metrics.dump(args.metrics)
+
+def _run_command(args):
+    if args.command is None:
+        main(args.api_port, args.columnar)
+        return 0
+    
+    if args.command == 'aggregate':
+        paths = tracker_files(args.paths)
+        if not paths:
+            print('No tracker files found', file=sys.stderr)
+            return 1
+        start = time.perf_counter()
+        stats, count, errors = aggregate_files(paths, args.workers, not args.serial)
+        print(format_stats(stats))
+        for path, error in errors:
+            print(f'Skipped {path}: {error}', file=sys.stderr)
+        print(f'{count} matches from {len(paths) - len(errors)} files in {time.perf_counter() - start:.2f}s',
+              file=sys.stderr)
+        return 1 if errors else 0
+    
+    os.makedirs(args.data_dir, exist_ok=True)
+    tracker, filename = open_tracker(args.data_dir, args.storage, columnar=args.columnar)
+    tracker.load_from_file(filename)
+    
+    if args.command == 'import':
+        start = time.perf_counter()
+        try:
+            imported, skipped = import_matches(tracker, args.files, args.format, args.chunk_size)
+        except OSError as e:
+            print(f'Import failed: {e}', file=sys.stderr)
+            return 1
+        parsed = time.perf_counter() - start
+        tracker.save_to_file(filename)
+        tracker.close()
+        elapsed = time.perf_counter() - start
+        print(f'Imported {imported} matches ({skipped} skipped) in {elapsed:.2f}s '
+              f'({imported / parsed if parsed else 0:,.0f} rows/s, {elapsed - parsed:.2f}s saving)')
+    elif args.command == 'export':
+        tracker.export_json(args.file)
+        tracker.close()
+        print(f'Exported {len(tracker)} matches to {args.file}')
+    elif args.command == 'sync':
+        start = time.perf_counter()
+        try:
+            exported, merged = sync_folder(tracker, filename, args.folder, args.device)
+        except (OSError, ValueError) as e:
+            print(f'Sync failed: {e}', file=sys.stderr)
+            return 1
+        finally:
+            tracker.close()
+        for path, message in merged:
+            print(f'{os.path.basename(path)}: {message}')
+        print(f'Exported {exported} changes, merged {len(merged)} delta files in {time.perf_counter() - start:.2f}s')
+    elif args.command == 'changes':
+        delta = tracker.export_changes(args.since)
+        write_delta(delta, args.file)
+        tracker.close()
+        print(f"Wrote {len(delta['matches'])} changed and {len(delta['deleted'])} deleted matches "
+              f"(seq {args.since} to {delta['seq']}) to {args.file}")
+    elif args.command == 'merge':
+        for path in args.files:
+            try:
+                success, message = tracker.merge_changes(read_delta(path))
+            except (OSError, ValueError) as e:
+                success, message = False, str(e)
+            print(f'{path}: {message}', file=sys.stdout if success else sys.stderr)
+        tracker.save_to_file(filename)
+        tracker.close()
+    elif args.command == 'serve':
+        server = StatsServer(tracker, args.host, args.port)
+        try:
+            server.start()
+        except (ImportError, OSError) as e:
+            print(f'The stats API could not be started: {e}', file=sys.stderr)
+            return 1
+        print(f'Serving {len(tracker)} matches on http://{args.host}:{server.port}/stats (Ctrl+C to stop)')
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        server.stop()
+        tracker.close()
+    return 0
 
 if __name__ == '__main__':
-    main()
+    sys.exit(cli())
@@ -0,0 +1,68 @@
+import json
+import os
+
+from main import (BinaryStorage, JsonStorage, PokemonDeckTracker, SqliteStorage, _plain_stats, aggregate_files,
+                  tracker_files)
+
+PLAYERS = {
+    'alice': (BinaryStorage, 'pokemon_stats.pdt'),
+    'bob': (lambda: JsonStorage(journal=True), 'pokemon_stats.json'),
+    'carol': (SqliteStorage, 'pokemon_stats.db'),
+}
+DECKS = ['Mewtwo ex', 'Pikachu ex', 'Charizard ex']
+ARCHETYPES = ['Mew ex', 'Starmie ex', 'Gardevoir', 'Dragonite']
+
+def write_team(root):
+    """One data directory per player, each in a different format; returns the combined tracker"""
+    everyone = PokemonDeckTracker()
+    for number, (player, (storage, name)) in enumerate(PLAYERS.items()):
+        data_dir = root / player / 'data'
+        data_dir.mkdir(parents=True)
+        tracker = PokemonDeckTracker(storage())
+        for i in range(40 + number * 25):
+            deck = DECKS[(i + number) % len(DECKS)]
+            opponent = ARCHETYPES[(i * 7 + number) % len(ARCHETYPES)]
+            result = 'win' if i % 3 else 'loss' if i % 2 else 'draw'
+            for target in (tracker, everyone):
+                target.add_matches([{'date': '2024-05-01 12:00', 'deck': deck, 'opponent': opponent,
+                                     'result': result, 'notes': ''}])
+        tracker.save_to_file(str(data_dir / name))
+        tracker.close()
+        # Files a sync folder or an export leaves lying around are not histories
+        (data_dir / 'laptop-1.delta.json').write_text(json.dumps({'format': 'pokemon-deck-tracker-delta'}))
+        (data_dir / 'laptop.sync.json').write_text('{}')
+        tracker.export_json(str(data_dir / 'export.json'))
+    return everyone
+
+def test_tracker_files_only_picks_histories(tmp_path):
+    write_team(tmp_path)
+    found = tracker_files([str(tmp_path)])
+    assert [os.path.relpath(path, tmp_path) for path in found] == [
+        os.path.join('alice', 'data', 'pokemon_stats.pdt'),
+        os.path.join('bob', 'data', 'pokemon_stats.json'),
+        os.path.join('carol', 'data', 'pokemon_stats.db'),
+    ]
+    export = str(tmp_path / 'bob' / 'data' / 'export.json')
+    assert tracker_files([export]) == [export]
+
+def test_parallel_and_serial_aggregates_match(tmp_path):
+    everyone = write_team(tmp_path)
+    paths = tracker_files([str(tmp_path / '*' / 'data')])
+    parallel = aggregate_files(paths, workers=2)
+    serial = aggregate_files(paths, parallel=False)
+    assert _plain_stats(parallel[0]) == _plain_stats(serial[0]) == _plain_stats(everyone.get_deck_stats())
+    assert parallel[1] == serial[1] == len(everyone)
+    assert parallel[2] == serial[2] == []
+
+def test_unreadable_file_is_reported(tmp_path):
+    everyone = write_team(tmp_path)
+    broken = tmp_path / 'dave' / 'data'
+    broken.mkdir(parents=True)
+    (broken / 'pokemon_stats.pdt').write_bytes(b'not a tracker file')
+    paths = tracker_files([str(tmp_path)])
+    assert len(paths) == 4
+    for parallel in (True, False):
+        stats, count, errors = aggregate_files(paths, workers=2, parallel=parallel)
+        assert _plain_stats(stats) == _plain_stats(everyone.get_deck_stats())
+        assert count == len(everyone)
+        assert [path for path, _ in errors] == [str(broken / 'pokemon_stats.pdt')]
@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+import main
+from main import NotesIndex, PokemonDeckTracker, _plain_stats, open_tracker, parse_date
+
+def history(tracker):
+    return {match['id']: dict(match) for match in tracker._matches.values()}
+
+def assert_indexes_match(tracker):
+    """Every incremental index agrees with one rebuilt from the matches"""
+    matches = tracker._matches.values()
+    assert _plain_stats(tracker._stats) == _plain_stats(tracker._compute_deck_stats())
+    assert {name: count for name, count in tracker._archetype_counts.items() if count} == dict(
+        main.Counter(match['opponent'] for match in matches))
+    tracker._sort_timeline()
+    assert list(zip(tracker._times, tracker._time_ids)) == sorted((parse_date(m['date']), m['id']) for m in matches)
+    assert tracker.notes_index.postings == NotesIndex.from_matches(matches).postings
+    assert tracker.decks == {match['deck'] for match in matches}
+
+def make_changes(tracker):
+    """One of every journaled operation"""
+    for i in range(30):
+        tracker.add_match(f'Deck {i % 4}', f'Archetype {i % 5}', i % 3 != 0, 'went second' if i % 4 else 'bricked')
+    tracker.add_matches([{'date': f'2024-03-{day:02d} 10:00', 'deck': 'Deck 1', 'opponent': 'Archetype 9',
+                          'result': 'loss', 'notes': 'imported'} for day in range(1, 11)])
+    ids = sorted(match_id for match_id, match in tracker._matches.items() if match['deck'].startswith('Deck'))
+    tracker.edit_match(ids[0], 'Deck 2', 'Archetype 7', True, 'misty flips')
+    tracker.delete_match(ids[1])
+    tracker.rename_deck('Deck 3', 'Deck 5')
+    tracker.delete_deck('Deck 0')
+    tracker.batch_update({'Deck 1': 'Deck 2', 'Deck 2': 'Deck 1'}, {'Archetype 4': 'Archetype 0'})
+    tracker.batch_update(where={'deck': 'Deck 1', 'notes': 'went'}, changes={'notes': 'went first', 'result': 'draw'})
+    other = PokemonDeckTracker()
+    other.merge_changes(tracker.export_changes())
+    other.add_match('Deck 8', 'Archetype 8', True, 'from the laptop')
+    other.edit_match(ids[2], 'Deck 8', 'Archetype 1', False, 'edited on the laptop')
+    other.delete_match(ids[3])
+    assert tracker.merge_changes(other.export_changes(tracker._journal_seq))[0]
+
+@pytest.mark.parametrize('backend', ['binary', 'json'])
+def test_journal_replay_keeps_snapshot_indexes(tmp_path, monkeypatch, backend):
+    tracker, filename = open_tracker(str(tmp_path), backend)
+    tracker.load_from_file(filename)
+    tracker.add_matches([{'date': f'2024-01-{day:02d} {10 + hour}:00', 'deck': f'Old deck {day % 4}',
+                          'opponent': f'Old archetype {hour}', 'result': 'win', 'notes': 'went second'}
+                         for day in range(1, 29) for hour in range(10)])
+    tracker.save_to_file(filename)
+    make_changes(tracker)
+    tracker.save_to_file(filename)
+    tracker.close()
+    assert os.path.getsize(filename + main.JOURNAL_SUFFIX) > 0
+
+    def rebuilt(matches):
+        raise AssertionError('the notes index was rebuilt')
+    monkeypatch.setattr(NotesIndex, 'from_matches', rebuilt)
+    parsed = []
+    monkeypatch.setattr(main, 'parse_date', lambda value: parsed.append(value) or parse_date(value))
+    reloaded, _ = open_tracker(str(tmp_path), backend)
+    reloaded.load_from_file(filename)
+    monkeypatch.undo()
+
+    assert history(reloaded) == history(tracker)
+    if backend == 'binary':
+        # The snapshot's dates come with its timeline; only replayed matches are parsed
+        assert parsed and not any(date.startswith('2024-01') for date in parsed)
+    assert_indexes_match(reloaded)
+    assert _plain_stats(reloaded.get_deck_stats()) == _plain_stats(tracker.get_deck_stats())
+    assert reloaded.export_changes() == tracker.export_changes()
+    reloaded.close()
+
+@pytest.mark.parametrize('backend', ['binary', 'json', 'sqlite'])
+def test_batch_update_survives_reload(tmp_path, backend):
+    tracker, filename = open_tracker(str(tmp_path), backend)
+    tracker.load_from_file(filename)
+    for i in range(20):
+        tracker.add_match(f'Deck {i % 3}', f'Archetype {i % 4}', i % 2 == 0, 'went second' if i % 3 else '')
+    tracker.save_to_file(filename)
+    tracker.batch_update({'Deck 0': 'Deck 1', 'Deck 1': 'Deck 0'}, {'Archetype 3': 'Archetype 0'})
+    tracker.batch_update({'Deck 2': 'Deck 0'}, where={'deck': 'Deck 0', 'notes': 'went'},
+                         changes={'result': 'draw', 'notes': 'reviewed'})
+    tracker.save_to_file(filename)
+    tracker.close()
+
+    reloaded, _ = open_tracker(str(tmp_path), backend)
+    reloaded.load_from_file(filename)
+    assert history(reloaded) == history(tracker)
+    assert _plain_stats(reloaded.get_deck_stats()) == _plain_stats(tracker.get_deck_stats())
+    assert_indexes_match(reloaded)
+    reloaded.close()
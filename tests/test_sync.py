@@ -0,0 +1,116 @@
+import itertools
+import os
+import random
+import shutil
+
+from main import DELTA_SUFFIX, PokemonDeckTracker, open_tracker, sync_folder
+
+DECKS = ['Mewtwo ex', 'Pikachu ex', 'Charizard ex']
+ARCHETYPES = ['Mew ex', 'Starmie ex', 'Gardevoir']
+
+def history(tracker):
+    return {match['uid']: (match['date'], match['deck'], match['opponent'], match['result'], match['notes'])
+            for match in tracker._matches.values()}
+
+def play(tracker, rnd, count):
+    """Random adds, edits, deletes and renames"""
+    for _ in range(count):
+        ids = list(tracker._matches)
+        roll = rnd.random()
+        if roll < 0.5 or not ids:
+            tracker.add_match(rnd.choice(DECKS), rnd.choice(ARCHETYPES), rnd.random() < 0.5, rnd.choice(['', 'bricked']))
+        elif roll < 0.75:
+            tracker.edit_match(rnd.choice(ids), rnd.choice(DECKS), rnd.choice(ARCHETYPES), rnd.random() < 0.5, 'edited')
+        elif roll < 0.95:
+            tracker.delete_match(rnd.choice(ids))
+        elif 'Pikachu ex' in tracker.decks:
+            tracker.rename_deck('Pikachu ex', 'Raichu ex')
+
+def test_merge_order_does_not_matter():
+    rnd = random.Random(7)
+    devices = [PokemonDeckTracker() for _ in range(3)]
+    play(devices[0], rnd, 40)
+    shared = devices[0].export_changes()
+    for device in devices[1:]:
+        device.merge_changes(shared)
+    for device in devices:
+        play(device, rnd, 30)
+    deltas = [device.export_changes() for device in devices]
+
+    results = []
+    for order in itertools.permutations(range(3)):
+        copy = PokemonDeckTracker()
+        for index in order:
+            assert copy.merge_changes(deltas[index])[0]
+        # Merging the same deltas again changes nothing
+        for index in order:
+            copy.merge_changes(deltas[index])
+        results.append(history(copy))
+    assert all(result == results[0] for result in results)
+
+    for device in devices:
+        for delta in deltas:
+            device.merge_changes(delta)
+    assert all(history(device) == results[0] for device in devices)
+
+def open_device(data_dir):
+    data_dir.mkdir(exist_ok=True)
+    tracker, filename = open_tracker(str(data_dir), 'binary')
+    tracker.load_from_file(filename)
+    return tracker, filename
+
+def sync(device, folder, name):
+    tracker, filename = device
+    return sync_folder(tracker, filename, str(folder), name)
+
+def test_sync_folder_exchanges_changes(tmp_path):
+    folder = tmp_path / 'shared'
+    a = open_device(tmp_path / 'a')
+    b = open_device(tmp_path / 'b')
+    rnd = random.Random(3)
+    for _ in range(3):
+        play(a[0], rnd, 15)
+        play(b[0], rnd, 15)
+        sync(a, folder, 'A')
+        sync(b, folder, 'B')
+        sync(a, folder, 'A')
+        assert history(a[0]) == history(b[0])
+    # Nothing new: no files are written
+    files = sorted(os.listdir(folder))
+    assert sync(a, folder, 'A')[0] == sync(b, folder, 'B')[0] == 0
+    assert sorted(os.listdir(folder)) == files
+
+def test_sync_after_restoring_a_backup(tmp_path):
+    folder = tmp_path / 'shared'
+    a = open_device(tmp_path / 'a')
+    b = open_device(tmp_path / 'b')
+    for i in range(3):
+        a[0].add_match('Mewtwo ex', 'Mew ex', True, f'first {i}')
+    sync(a, folder, 'A')
+    a[0].close()
+    shutil.copytree(tmp_path / 'a', tmp_path / 'backup')
+    a = open_device(tmp_path / 'a')
+    for i in range(5):
+        a[0].add_match('Pikachu ex', 'Starmie ex', False, f'lost {i}')
+    sync(a, folder, 'A')
+    sync(b, folder, 'B')
+    assert len(b[0]) == 8
+
+    a[0].close()
+    shutil.rmtree(tmp_path / 'a')
+    shutil.copytree(tmp_path / 'backup', tmp_path / 'a')
+    a = open_device(tmp_path / 'a')
+    assert len(a[0]) == 3
+    for i in range(5):
+        a[0].add_match('Charizard ex', 'Gardevoir', True, f'new after restore {i}')
+    before = {name: os.path.getmtime(folder / name) for name in os.listdir(folder) if name.endswith(DELTA_SUFFIX)}
+    sync(a, folder, 'A')
+    sync(b, folder, 'B')
+    sync(a, folder, 'A')
+
+    assert len(a[0]) == len(b[0]) == 13
+    assert history(a[0]) == history(b[0])
+    # Earlier deltas are never overwritten
+    assert all(os.path.getmtime(folder / name) == mtime for name, mtime in before.items())
+    a[0].close()
+    b[0].close()
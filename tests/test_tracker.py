@@ -0,0 +1,141 @@
+import time
+from datetime import timedelta
+
+import pytest
+
+from main import BinaryStorage, PokemonDeckTracker, find_near_duplicates, parse_date
+
+class NoScanDict(dict):
+    """Match store that fails the test if anything walks over it"""
+    def _scan(self, *args):
+        raise AssertionError('the match store was scanned')
+    __iter__ = keys = values = items = _scan
+
+def add_matches_one_by_one(count):
+    tracker = PokemonDeckTracker()
+    start = time.perf_counter()
+    for i in range(count):
+        tracker.add_match(f'Deck {i % 7}', f'Archetype {i % 11}', i % 2 == 0, '')
+    return time.perf_counter() - start, tracker
+
+def test_next_id_does_not_scan():
+    _, tracker = add_matches_one_by_one(1000)
+    tracker._matches = NoScanDict(tracker._matches)
+    assert tracker._get_next_id() == 1000
+    assert tracker.add_match('Deck 0', 'Archetype 0', True) == 1000
+    assert tracker._get_next_id() == 1001
+
+def test_bulk_add_match_is_linear():
+    # 100k matches one call at a time; a per-call scan would make doubling the count quadruple the time
+    count = 50000
+    single = min(add_matches_one_by_one(count)[0] for _ in range(2))
+    double, tracker = min((add_matches_one_by_one(count * 2) for _ in range(2)), key=lambda run: run[0])
+    assert len(tracker) == count * 2
+    assert double / single < 3
+
+def test_stats_text_order_is_stable(tmp_path):
+    matches = [('Pikachu ex', 'Starmie ex', True), ('Charizard ex', 'Mew ex', False), ('Mewtwo ex', 'Gardevoir', None),
+               ('Charizard ex', 'Starmie ex', True), ('Pikachu ex', 'Mew ex', False), ('Mewtwo ex', 'Articuno ex', True)]
+    forward = PokemonDeckTracker(BinaryStorage())
+    for match in matches:
+        forward.add_match(*match)
+    backward = PokemonDeckTracker()
+    for match in reversed(matches):
+        backward.add_match(*match)
+    # Moving a match to another deck and back reorders the aggregate's insertion history
+    match_id = backward.add_match('Zapdos ex', 'Mew ex', True)
+    backward.edit_match(match_id, 'Alakazam', 'Mew ex', True)
+    backward.delete_match(match_id)
+    filename = str(tmp_path / 'pokemon_stats.pdt')
+    forward.save_to_file(filename)
+    forward.close()
+    reloaded = PokemonDeckTracker(BinaryStorage())
+    reloaded.load_from_file(filename)
+    
+    text = forward.get_stats_text()
+    assert backward.get_stats_text() == reloaded.get_stats_text() == text
+    headings = [line for line in text.splitlines() if line.startswith('===')]
+    assert headings == sorted(headings)
+    assert text.index('vs Mew ex') < text.index('vs Starmie ex')
+    reloaded.close()
+
+def test_verify_mode_checks_every_read():
+    tracker = PokemonDeckTracker(verify_stats=True)
+    ids = [tracker.add_match(f'Deck {i % 3}', f'Archetype {i % 4}', i % 3 != 0, 'bricked' if i % 5 == 0 else '')
+           for i in range(60)]
+    tracker.edit_match(ids[0], 'Deck 2', 'Archetype 9', False, 'went second')
+    tracker.delete_match(ids[1])
+    tracker.rename_deck('Deck 1', 'Deck 4')
+    tracker.batch_update({'Deck 4': 'Deck 0'}, {'Archetype 3': 'Archetype 0'})
+    for deck in (None, 'Deck 0', 'Deck 2'):
+        tracker.get_deck_stats(deck)
+        tracker.get_stats_text(deck)
+        tracker.get_stats_text(deck, since='2000-01-01 00:00')
+    
+    tracker._stats['Deck 0']['wins'] += 1
+    with pytest.raises(AssertionError):
+        tracker.get_deck_stats('Deck 0')
+
+def test_timeline_with_shared_timestamps():
+    # Imports often give every row the same minute; deletes and edits must find their own entry
+    tracker = PokemonDeckTracker()
+    tracker.add_matches([{'date': '2024-05-01 12:00', 'deck': 'Deck', 'opponent': 'Archetype', 'result': 'win',
+                          'notes': ''}] * 500)
+    for match_id in range(0, 500, 3):
+        tracker.delete_match(match_id)
+    for match_id in range(1, 500, 3):
+        tracker.edit_match(match_id, 'Deck', 'Archetype', False, '')
+    for match_id in range(2, 500, 6):
+        match = tracker._matches[match_id]
+        tracker._unindex_time(match)
+        match['date'] = '2024-05-01 11:59' if match_id % 4 else '2024-05-01 12:01'
+        tracker._index_time(match)
+    expected = sorted((parse_date(match['date']), match['id']) for match in tracker._matches.values())
+    assert list(zip(tracker._times, tracker._time_ids)) == expected
+
+def test_near_duplicates_ignore_a_trailing_ex():
+    assert find_near_duplicates({'Mewtwo ex': 3, 'Mewtwo EX': 1, 'mewtwo': 1}) == [('Mewtwo ex', ['Mewtwo EX', 'mewtwo'])]
+    assert find_near_duplicates({'Mew ex': 2, 'Mew': 1, 'Charizard ex': 2, 'Charizard': 1}) == [
+        ('Charizard ex', ['Charizard']), ('Mew ex', ['Mew'])]
+    assert find_near_duplicates({'Mewtwo ex': 2, 'Mewtow ex': 1, 'Mew ex': 1}) == [('Mewtwo ex', ['Mewtow ex'])]
+
+def test_batch_update_swaps_names():
+    tracker = PokemonDeckTracker(verify_stats=True)
+    for _ in range(3):
+        tracker.add_match('Deck A', 'Archetype X', True)
+    tracker.add_match('Deck B', 'Archetype Y', False)
+    tracker.last_used_deck = 'Deck A'
+    assert tracker.batch_update({'Deck A': 'Deck B', 'Deck B': 'Deck A'}, {'Archetype X': 'Archetype Y',
+                                                                           'Archetype Y': 'Archetype X'})[0]
+    stats = tracker.get_deck_stats()
+    assert (stats['Deck B']['wins'], dict(stats['Deck B']['matchups'])) == (
+        3, {'Archetype Y': {'wins': 3, 'losses': 0, 'draws': 0}})
+    assert (stats['Deck A']['losses'], dict(stats['Deck A']['matchups'])) == (
+        1, {'Archetype X': {'wins': 0, 'losses': 1, 'draws': 0}})
+    assert tracker.last_used_deck == 'Deck B'
+    assert tracker.decks == {'Deck A', 'Deck B'}
+
+def test_batch_update_merge_and_filtered_edit():
+    tracker = PokemonDeckTracker(verify_stats=True)
+    tracker.add_match('Mewtwo EX', 'Mew ex', True, 'went second')
+    tracker.add_match('Mewtwo ex', 'Mew ex', False, 'went second')
+    tracker.add_match('Mewtwo ex', 'Starmie ex', False, 'went second')
+    kept = tracker.add_match('Pikachu ex', 'Mew ex', True, 'went second')
+    # where is checked against the merged names
+    success, message = tracker.batch_update({'Mewtwo EX': 'Mewtwo ex'}, where={'deck': 'Mewtwo ex', 'opponent': 'Mew ex'},
+                                            changes={'result': 'draw', 'notes': 'reviewed'})
+    assert success, message
+    assert tracker.decks == {'Mewtwo ex', 'Pikachu ex'}
+    stats = tracker.get_deck_stats('Mewtwo ex')['Mewtwo ex']
+    assert (stats['wins'], stats['draws'], stats['losses']) == (0, 2, 1)
+    assert {match['id'] for match in tracker.search_notes('reviewed')} == {0, 1}
+    assert tracker.get_match_by_id(kept)['notes'] == 'went second'
+
+def test_rolling_winrate_needs_a_positive_window():
+    tracker = PokemonDeckTracker()
+    for won in (True, False, True, True):
+        tracker.add_match('Deck', 'Archetype', won)
+    assert [round(rate) for _, rate in tracker.get_rolling_winrate('Deck', 2)['overall']] == [100, 50, 50, 100]
+    for window in (0, -3, timedelta(0), timedelta(milliseconds=500), timedelta(minutes=-5)):
+        with pytest.raises(ValueError, match='Rolling window'):
+            tracker.get_rolling_winrate('Deck', window)